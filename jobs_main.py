@@ -1,25 +1,94 @@
 import asyncio
+import logging
 import os
+import signal
+import subprocess
+import sys
 
 from telegram import Bot
 
-from src.biblio.config.config import get_parser, load_env
+from src.biblio.config.config import get_parser, get_worker_id, load_env
 from src.biblio.config.logger import setup_logger
 from src.biblio.db.build import build_db
-from src.biblio.jobs import schedule_reserve_job, schedule_sweeper_job
+from src.biblio.jobs import (
+    drain_jobs,
+    schedule_launcher_job,
+    schedule_notification_job,
+    schedule_reserve_job,
+    schedule_sweeper_job,
+)
 
 
-async def main():
-    setup_logger()
+def parse_args():
     parser = get_parser()
-    args = parser.parse_args()
+    parser.add_argument(
+        "-workers",
+        type=int,
+        default=1,
+        help="Number of reservation worker processes to supervise",
+    )
+    parser.add_argument(
+        "-shard",
+        action="store_true",
+        help="Keep each user's reservations on one worker (hash of user id)",
+    )
+    return parser.parse_args()
+
+
+def supervise(args) -> int:
+    """Run `args.workers` copies of this script, forwarding stop signals to them."""
+    base_id = os.getenv("WORKER_ID") or get_worker_id()
+    children: list[subprocess.Popen] = []
+    for index in range(args.workers):
+        env = {
+            **os.environ,
+            "WORKER_ID": f"{base_id}-w{index}",
+            "WORKER_INDEX": str(index),
+            "WORKER_COUNT": str(args.workers),
+        }
+        if args.shard:
+            env["WORKER_SHARD"] = "user"
+        children.append(
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "-env", args.env],
+                env=env,
+            )
+        )
+    logging.info(f"[WORKER] Supervising {len(children)} reservation workers")
+
+    def forward(signum, _frame):
+        for child in children:
+            if child.poll() is None:
+                child.send_signal(signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    return max(child.wait() for child in children)
+
+
+async def main(args):
     load_env(args.env)
     await build_db()
     bot = Bot(token=os.getenv("TELEGRAM_TOKEN"))
-    schedule_reserve_job(bot)
+    logging.info(f"[WORKER] Reservation worker {get_worker_id()} starting")
+    schedule_launcher_job()
+    schedule_reserve_job()
     schedule_sweeper_job()
-    await asyncio.Event().wait()  # keep loop alive
+    schedule_notification_job(bot)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()  # keep loop alive until the platform asks us to stop
+
+    logging.info("[SHUTDOWN] Stop signal received — draining reservation jobs")
+    await drain_jobs()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    setup_logger()
+    args = parse_args()
+    if args.workers > 1:
+        sys.exit(supervise(args))
+    asyncio.run(main(args))
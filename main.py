@@ -1,7 +1,8 @@
 import asyncio
+import logging
 import os
+import time
 
-import uvicorn
 from telegram.ext import Application
 
 from src.biblio.app import build_app
@@ -9,11 +10,19 @@ from src.biblio.config.config import get_parser, load_env
 from src.biblio.config.logger import setup_logger
 from src.biblio.db.build import build_db
 from src.biblio.db.update import sync_user_priorities
-from src.biblio.server import users_server
+from src.biblio.utils.broadcast import (
+    keep_resuming_broadcasts,
+    release_broadcast_leases,
+)
+from src.biblio.utils.charts import shutdown_chart_pool
 from src.biblio.utils.notif import notify_deployment
 
 
 async def start_server():
+    import uvicorn  # the web server is not on the bot's cold-start path
+
+    from src.biblio.server import users_server
+
     port = int(os.getenv("PORT", 8000))
     config = uvicorn.Config(
         users_server,
@@ -25,24 +34,55 @@ async def start_server():
     await server.serve()
 
 
+def log_cold_start(phases: dict[str, float]) -> None:
+    """How long after process start the bot began polling, and where it went."""
+    import psutil
+
+    total = time.time() - psutil.Process().create_time()
+    boot = total - sum(phases.values())  # interpreter and imports
+    breakdown = ", ".join(f"{name} {took:.2f}s" for name, took in phases.items())
+    logging.info(
+        f"[STARTUP] 🚀 Polling {total:.2f}s after process start "
+        f"(boot {boot:.2f}s, {breakdown})"
+    )
+
+
 async def start_bot():
+    phases, mark = {}, time.perf_counter()
+
+    def phase(name: str) -> None:
+        nonlocal mark
+        now = time.perf_counter()
+        phases[name] = now - mark
+        mark = now
+
     setup_logger()
     parser = get_parser()
     args = parser.parse_args()
     load_env(args.env)
     app: Application = build_app()
+    phase("build")
     await build_db()
     await sync_user_priorities()
+    phase("db")
     await app.initialize()
+    phase("initialize")
     # await notify_deployment(app.bot) #! temporary
     await app.start()
-    await app.updater.start_polling()
+    await app.updater.start_polling()  # the first getUpdates goes out right after
+    phase("polling")
+    log_cold_start(phases)
+    resume_task = asyncio.create_task(keep_resuming_broadcasts(app.bot))
     try:
         await asyncio.Event().wait()
     finally:
+        resume_task.cancel()
+        await asyncio.gather(resume_task, return_exceptions=True)
         await app.updater.stop()
         await app.stop()
         await app.shutdown()
+        await release_broadcast_leases()  # nothing sends any more
+        shutdown_chart_pool()
 
 
 async def main():
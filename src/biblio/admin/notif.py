@@ -1,39 +1,14 @@
-import asyncio
-import logging
 import os
 import textwrap
 
-import httpx
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.biblio.config.config import State, UserDataKey
 from src.biblio.db.fetch import fetch_all_user_chat_ids
+from src.biblio.utils.broadcast import broadcast
 from src.biblio.utils.keyboards import Keyboard, Label
 
-MAX_CONCURRENCY = 10
-
-
-async def _send_notification(
-    client: httpx.AsyncClient,
-    url: str,
-    chat_id: int,
-    notif: str,
-    sem: asyncio.Semaphore,
-):
-    async with sem:
-        try:
-            resp = await client.post(
-                url,
-                data={"chat_id": chat_id, "text": notif, "parse_mode": "Markdown"},
-                timeout=20,
-            )
-            resp.raise_for_status()
-            return chat_id, None
-        except Exception as exc:
-            logging.warning("Push notif failed for chat_id=%s: %s", chat_id, exc)
-            return chat_id, exc
-
 
 async def prepare_notification(
     update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -70,8 +45,6 @@ async def push_notification(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     elif user_input == Label.CONFIRM_YES:
         ids = await fetch_all_user_chat_ids()
-        url = f"https://api.telegram.org/bot{os.getenv('TELEGRAM_TOKEN')}/sendMessage"
-
         ids = [
             chat_id for chat_id in ids if str(chat_id) != os.getenv("BOTLORD_CHAT_ID")
         ]
@@ -82,17 +55,12 @@ async def push_notification(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
             return State.ADMIN_PANEL
 
-        sem = asyncio.Semaphore(MAX_CONCURRENCY)
-        async with httpx.AsyncClient() as client:
-            results = await asyncio.gather(
-                *(
-                    _send_notification(client, url, chat_id, notif, sem)
-                    for chat_id in ids
-                )
-            )
-
-        sent = sum(1 for _, err in results if err is None)
-        failed_ids = [chat_id for chat_id, err in results if err is not None]
+        message = update.message
+        result = await broadcast(
+            context.bot, f"admin:{message.chat_id}:{message.message_id}", ids, notif
+        )
+        sent = result.sent
+        failed_ids = result.failed
 
         failed_block = (
             "\nFailed ids:\n" + "\n".join(map(str, failed_ids)) if failed_ids else ""
@@ -1,10 +1,12 @@
 import os
 
+from telegram import Update
 from telegram.ext import (
     Application,
     CommandHandler,
     ConversationHandler,
     MessageHandler,
+    TypeHandler,
     filters,
 )
 
@@ -20,11 +22,11 @@ from src.biblio.bot.commands import agreement, donate, feedback, help, start
 from src.biblio.bot.fallbacks import error, fallback, restart
 from src.biblio.bot.user import user_agreement, user_returning, user_validation
 from src.biblio.config.config import State
-from src.biblio.jobs import start_jobs
 from src.biblio.selection.cancel import cancelation, cancelation_confirmation
 from src.biblio.selection.confirm import confirmation
 from src.biblio.selection.date import date_history, date_selection
 from src.biblio.selection.duration import duration_availability, duration_selection
+from src.biblio.selection.past import past_reservations
 from src.biblio.selection.retry import retry
 from src.biblio.selection.time import (
     filter_end_selection,
@@ -33,10 +35,25 @@ from src.biblio.selection.time import (
     time_selection,
 )
 from src.biblio.selection.type import type_selection
+from src.biblio.utils.persistence import PostgresPersistence
+from src.biblio.utils.user_data import (
+    CONVERSATION_TIMEOUT,
+    MEMORY_REPORT_INTERVAL,
+    configure_heavy_values,
+    expire_conversation,
+    log_user_data_report,
+)
 
 
 def build_app():
-    app = Application.builder().token(os.getenv("TELEGRAM_TOKEN")).build()
+    app = (
+        Application.builder()
+        .token(os.getenv("TELEGRAM_TOKEN"))
+        .persistence(PostgresPersistence())
+        .build()
+    )
+    conversation_timeout = int(os.getenv("CONVERSATION_TIMEOUT", CONVERSATION_TIMEOUT))
+    configure_heavy_values(conversation_timeout)
 
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler("start", start)],
@@ -113,6 +130,10 @@ def build_app():
                 )
             ],
             State.RETRY: [MessageHandler(filters.TEXT & ~filters.COMMAND, retry)],
+            State.PAST_RESERVATIONS: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, past_reservations)
+            ],
+            ConversationHandler.TIMEOUT: [TypeHandler(Update, expire_conversation)],
         },
         fallbacks=[
             CommandHandler("start", start),  # Allows /start to reset everything
@@ -124,11 +145,18 @@ def build_app():
             MessageHandler(filters.ALL, maintenance_gate),
         ],
         allow_reentry=True,
+        conversation_timeout=conversation_timeout,
+        name="biblio",
+        persistent=True,
     )
     app.add_handler(conv_handler)
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, restart))
     app.add_error_handler(error)
+    app.job_queue.run_repeating(
+        log_user_data_report, interval=MEMORY_REPORT_INTERVAL, first=60
+    )
 
-    # start_jobs(bot=app.bot) #! temporary
+    # from src.biblio.jobs import start_jobs  #! temporary
+    # start_jobs(bot=app.bot)
 
     return app
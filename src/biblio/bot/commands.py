@@ -21,6 +21,7 @@ from src.biblio.config.config import (
     get_priorities,
 )
 from src.biblio.db.fetch import fetch_existing_user
+from src.biblio.db.update import reset_delivery_state
 from src.biblio.utils.keyboards import Keyboard
 
 
@@ -31,6 +32,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
     is_admin = check_is_admin(chat_id=chat_id)
     context.user_data[UserDataKey.IS_ADMIN] = is_admin
+    await reset_delivery_state(chat_id)  # a blocked chat is reachable again
 
     if await should_block(chat_id=chat_id):
         await block_user_activity(update, context)
@@ -39,11 +41,11 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     existing_user = await fetch_existing_user(chat_id)
 
     if existing_user:
-        user_id = existing_user["id"]
-        codice: str = existing_user["codice_fiscale"]
-        name = existing_user["name"]
+        user_id = existing_user.id
+        codice: str = existing_user.codice_fiscale
+        name = existing_user.name
         first_name = user.first_name if user.first_name else username
-        email: str = existing_user["email"]
+        email: str = existing_user.email
         message = textwrap.dedent(
             f"""
             Welcome back *{first_name}*!
@@ -2,93 +2,42 @@ import logging
 import textwrap
 import traceback
 from datetime import datetime, time
-from io import BytesIO
-from zoneinfo import ZoneInfo
+from typing import TYPE_CHECKING
 
-import pandas as pd
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.biblio.config.config import BookingCodeStatus, Schedule, Status, UserDataKey
-from src.biblio.db.fetch import fetch_user_reservations
-from src.biblio.utils.utils import plot_slot_history, utc_tuple_to_rome_time
+from src.biblio.db.fetch import fetch_past_reservations, fetch_upcoming_reservations
+from src.biblio.db.records import ReservationRecord
+from src.biblio.utils.charts import render_slot_history
+from src.biblio.utils.utils import select_slot_window, utc_tuple_to_rome_time
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
 JOB_SCHEDULE = Schedule.jobs(daylight_saving=True)
 JOB_START, _ = JOB_SCHEDULE.get_hours("availability")
 MIN_AVAILABILITY_START = utc_tuple_to_rome_time(hour_minute=(JOB_START, 0))
+PAST_RESERVATIONS_PAGE = 10
 
 
 async def show_existing_reservations(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     cancel_stage: bool = False,
-) -> str:
+) -> str | list[ReservationRecord]:
     coidce = context.user_data[UserDataKey.CODICE_FISCALE]
     email = context.user_data[UserDataKey.EMAIL]
     try:
-        history: pd.DataFrame = await fetch_user_reservations(
-            coidce, email, include_date=False
-        )
-        if history.empty:
-            return "_You have no reservations at the moment._"
-        history["datetime"] = pd.to_datetime(
-            history["selected_date"].astype(str) + " " + history["end_time"].astype(str)
-        )  # ' ' acts as space
-        history["datetime"] = (
-            history["datetime"].dt.tz_localize("UTC").dt.tz_convert("Europe/Rome")
-        )
-        current = history[history["datetime"] > datetime.now(ZoneInfo("Europe/Rome"))]
-        current = current.sort_values("datetime", ascending=True)
-        name = (
-            update.effective_user.username
-            if update.effective_user.username
-            else update.effective_user.first_name
-        )
-        message = textwrap.dedent(
-            f"Reservations for *{name}*\nCodice Fiscale: *{coidce}*\nEmail: {email}\n-----------------------\n"
-        )
-        if len(current) != 0:
+        current = await fetch_upcoming_reservations(coidce, email)
+        message = _reservations_header(update, coidce, email)
+        if current:
             if cancel_stage:
                 return current
 
-            idx = 1
-            for _, row in current.iterrows():
-                try:
-                    status_enum = Status(row["status"])
-                    status = f"{status_enum.emoji} {row['status']}"
-                except ValueError:
-                    status = "undefined"
-                booking_code: str = str(row["booking_code"])
-                booking_code = (
-                    booking_code.replace(".", "").replace("+", "").replace("-", "")
-                )
-                if len(booking_code) < 6 and booking_code not in [
-                    BookingCodeStatus.TBD,
-                    BookingCodeStatus.NA,
-                    "INF",
-                    "inf",
-                ]:
-                    booking_code = booking_code.zfill(6)
-                res_type = "Instant" if row["instant"] == "True" else "Regular"
-                retry = (
-                    " - Retry at :00 and :30 of every hour."
-                    if row["status"] == Status.FAIL
-                    else ""
-                )
-                start_time_str = row["start_time"].strftime("%H:%M")
-                end_time_str = row["end_time"].strftime("%H:%M")
-                selected_date = row["selected_date"].strftime("%A, %Y-%m-%d")
-                message += textwrap.dedent(
-                    f"Reservation NO: *{idx:02d}*\n"
-                    f"Date: *{selected_date}*\n"
-                    f"Time: *{start_time_str}* - *{end_time_str}*\n"
-                    f"Duration: *{row['selected_duration']}* *hours*\n"
-                    f"Booking Code: *{booking_code.upper()}*\n"
-                    f"Reservation Type: *{res_type}*\n"
-                    f"Status: *{status.title()}*_{retry}_\n"
-                    f"-----------------------\n"
-                )
-                idx += 1
+            for idx, row in enumerate(current, start=1):
+                message += _format_reservation(idx, row)
         else:
             message += "_You have no reservations at the moment._"
         return message
@@ -97,6 +46,86 @@ async def show_existing_reservations(
         traceback.print_exc()
 
 
+async def show_past_reservations(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> tuple[str, bool]:
+    """
+    The next page of ended reservations, continuing from the cursor kept in
+    `user_data`. Returns the message and whether older reservations remain.
+    """
+    coidce = context.user_data[UserDataKey.CODICE_FISCALE]
+    email = context.user_data[UserDataKey.EMAIL]
+    cursor = context.user_data.get(UserDataKey.PAST_RESERVATIONS_CURSOR)
+    before, shown = (cursor[:3], cursor[3]) if cursor else (None, 0)
+
+    rows = await fetch_past_reservations(
+        coidce, email, before=before, limit=PAST_RESERVATIONS_PAGE + 1
+    )
+    has_more = len(rows) > PAST_RESERVATIONS_PAGE
+    rows = rows[:PAST_RESERVATIONS_PAGE]
+
+    message = _reservations_header(update, coidce, email)
+    if not rows:
+        return message + "_No past reservations._", False
+    for idx, row in enumerate(rows, start=shown + 1):
+        message += _format_reservation(idx, row)
+    last = rows[-1]
+    context.user_data[UserDataKey.PAST_RESERVATIONS_CURSOR] = (
+        last.selected_date,
+        last.end_time,
+        last.id,
+        shown + len(rows),
+    )
+    return message, has_more
+
+
+def _reservations_header(update: Update, coidce: str, email: str) -> str:
+    name = (
+        update.effective_user.username
+        if update.effective_user.username
+        else update.effective_user.first_name
+    )
+    return textwrap.dedent(
+        f"Reservations for *{name}*\nCodice Fiscale: *{coidce}*\nEmail: {email}\n-----------------------\n"
+    )
+
+
+def _format_reservation(idx: int, row: ReservationRecord) -> str:
+    try:
+        status_enum = Status(row.status)
+        status = f"{status_enum.emoji} {row.status}"
+    except ValueError:
+        status = "undefined"
+    booking_code: str = str(row.booking_code)
+    booking_code = booking_code.replace(".", "").replace("+", "").replace("-", "")
+    if len(booking_code) < 6 and booking_code not in [
+        BookingCodeStatus.TBD,
+        BookingCodeStatus.NA,
+        "INF",
+        "inf",
+    ]:
+        booking_code = booking_code.zfill(6)
+    res_type = "Instant" if row.instant else "Regular"
+    retry = (
+        " - Retry at :00 and :30 of every hour."
+        if row.status == Status.FAIL
+        else ""
+    )
+    start_time_str = row.start_time.strftime("%H:%M")
+    end_time_str = row.end_time.strftime("%H:%M")
+    selected_date = row.selected_date.strftime("%A, %Y-%m-%d")
+    return textwrap.dedent(
+        f"Reservation NO: *{idx:02d}*\n"
+        f"Date: *{selected_date}*\n"
+        f"Time: *{start_time_str}* - *{end_time_str}*\n"
+        f"Duration: *{row.selected_duration}* *hours*\n"
+        f"Booking Code: *{booking_code.upper()}*\n"
+        f"Reservation Type: *{res_type}*\n"
+        f"Status: *{status.title()}*_{retry}_\n"
+        f"-----------------------\n"
+    )
+
+
 def show_notification(status: str, record: dict, booking_code: str) -> str:
     if status == Status.SUCCESS:
         status_message = "✅ Reservation *Successful*!"
@@ -247,39 +276,22 @@ def show_help() -> str:
 
 async def show_slot_history(
     update: Update,
-    history: pd.DataFrame,
+    history: "DataFrame",
     date: str,
     slot: str,
     start: str = time(*MIN_AVAILABILITY_START).strftime("%H:%M"),
     end: str | None = None,
-) -> None | BytesIO:
+) -> None | bytes:
     slot_end_str = slot.split("-")[1]
     slot_end = datetime.strptime(slot_end_str, "%H:%M").time()
     parsed_start = datetime.strptime(start, "%H:%M").time()
     parsed_end = datetime.strptime(end, "%H:%M").time() if end else slot_end
 
-    all_slots = history.copy()
-    all_slots.rename(columns={"job_timestamp": "time"}, inplace=True)
-
-    all_slots["time"] = all_slots["time"].apply(
-        lambda t: t.replace(tzinfo=ZoneInfo("UTC"))
-        .astimezone(ZoneInfo("Europe/Rome"))
-        .strftime("%H:%M:%S")
-    )
-
-    all_slots = all_slots[
-        all_slots["time"].apply(
-            lambda t: parsed_start
-            <= datetime.strptime(t, "%H:%M:%S").time()
-            < parsed_end
-        )
-    ]
-
-    selected_slot = all_slots[all_slots["slot"] == slot][["time", "available"]]
+    selected_slot = select_slot_window(history, slot, parsed_start, parsed_end)
     if selected_slot.empty:
         return None
 
-    history_graph = plot_slot_history(
+    history_graph = await render_slot_history(
         selected_slot, date, slot, start, end=parsed_end.strftime("%H:%M")
     )
     return history_graph
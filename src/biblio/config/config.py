@@ -2,18 +2,22 @@ import argparse
 import json
 import logging
 import os
+import socket
 from dataclasses import dataclass
 from enum import IntEnum, StrEnum, auto
 from functools import cache
 from pathlib import Path
 
 import asyncpg
-import pygsheets
 from dotenv import load_dotenv
 
 CONFIG_DIR = Path(__file__).resolve().parents[2] / "biblio" / "config"
 DEFAULT_CREDENTIALS = CONFIG_DIR / "biblio.json"
 DEFAULT_PRIORITY = 5
+DEFAULT_WORKER_CONCURRENCY = 5
+DEFAULT_LAUNCH_LEAD_SECONDS = 75  # captcha solves take up to a minute
+DEFAULT_LAUNCH_JITTER_MS = 150
+SHARD_LOCK_PREFIX = "claim-shard-"
 RAILWAY_SERVICES = {
     "BiblioBot": "🤖",
     "Postgres": "🗃️",
@@ -61,6 +65,7 @@ class State(IntEnum):
     CANCELATION_SLOT_CHOICE = auto()
     CANCELATION_CONFIRMING = auto()
     RETRY = auto()
+    PAST_RESERVATIONS = auto()
 
 
 class EmojiStrEnum(StrEnum):
@@ -88,6 +93,18 @@ class BookingCodeStatus(StrEnum):
     CLOSED = "CLOSED"
 
 
+class FailureReason(StrEnum):
+    CAPTCHA = "captcha"
+    TIMEOUT = "timeout"
+    UPSTREAM = "upstream"  # network errors and 5xx
+    REJECTED = "rejected"  # 4xx from entry/store
+    INVALID = "invalid"  # bad user data or slot
+    NO_SEATS = "no_seats"
+    CONFIRM = "confirm"  # stored, confirmation pending
+    DEADLINE = "deadline"
+    UNKNOWN = "unknown"
+
+
 class UserDataKey(StrEnum):  # applies .lower() to next values
     IS_ADMIN = auto()
     AMDMIN_SERVICES = auto()
@@ -104,7 +121,6 @@ class UserDataKey(StrEnum):  # applies .lower() to next values
     SELECTED_TIME = auto()
     SELECTED_DURATION = auto()
     SLOT = auto()
-    SLOT_HISTORY = auto()
     FILTER_START = auto()
     FILTER_END = auto()
     CANCELATION_CHOICES = auto()
@@ -125,6 +141,7 @@ class UserDataKey(StrEnum):  # applies .lower() to next values
     CREATED_AT = auto()
     UPDATED_AT = auto()
     SUCCESS_AT = auto()
+    PAST_RESERVATIONS_CURSOR = auto()
     FAIL_AT = auto()
 
 
@@ -205,6 +222,8 @@ def check_is_admin(chat_id: str) -> bool:
 
 @cache
 def get_gsheet_client():
+    import pygsheets  # heavy google client stack, only needed for backups
+
     gsheets = os.getenv("GSHEETS")
     if gsheets:
         return pygsheets.authorize(service_account_json=gsheets)
@@ -219,6 +238,64 @@ def get_wks():
     )
 
 
+@cache
+def get_worker_id() -> str:
+    """Identity stamped on claimed rows; stable for the life of the process."""
+    replica = os.getenv("WORKER_ID") or os.getenv("RAILWAY_REPLICA_ID")
+    return replica or f"{socket.gethostname()}-{os.getpid()}"
+
+
+@cache
+def get_worker_concurrency() -> int:
+    """Reservations one jobs process works on at once (WORKER_CONCURRENCY)."""
+    try:
+        concurrency = int(os.getenv("WORKER_CONCURRENCY", DEFAULT_WORKER_CONCURRENCY))
+    except ValueError:
+        logging.warning("[WORKER] Invalid WORKER_CONCURRENCY; using the default.")
+        return DEFAULT_WORKER_CONCURRENCY
+    return max(concurrency, 1)
+
+
+@cache
+def get_launch_timing() -> tuple[float, float]:
+    """
+    (lead seconds, jitter ms) of the boundary launcher, from LAUNCH_LEAD_SECONDS and
+    LAUNCH_JITTER_MS.
+    """
+    try:
+        lead = float(os.getenv("LAUNCH_LEAD_SECONDS", DEFAULT_LAUNCH_LEAD_SECONDS))
+        jitter = float(os.getenv("LAUNCH_JITTER_MS", DEFAULT_LAUNCH_JITTER_MS))
+    except ValueError:
+        logging.warning("[WORKER] Invalid launcher timing; using the defaults.")
+        return DEFAULT_LAUNCH_LEAD_SECONDS, DEFAULT_LAUNCH_JITTER_MS
+    return max(lead, 1.0), max(jitter, 0.0)
+
+
+@cache
+def get_worker_shard() -> tuple[int, int] | None:
+    """
+    (index, count) of this worker when claims are sharded by user, else None.
+    Set WORKER_SHARD=user together with WORKER_INDEX/WORKER_COUNT; the jobs
+    supervisor does this for its children.
+    """
+    if os.getenv("WORKER_SHARD") != "user":
+        return None
+    try:
+        index = int(os.getenv("WORKER_INDEX", 0))
+        count = int(os.getenv("WORKER_COUNT", 1))
+    except ValueError:
+        logging.warning("[WORKER] Invalid WORKER_INDEX/WORKER_COUNT; no sharding.")
+        return None
+    if count <= 1 or not 0 <= index < count:
+        return None
+    return index, count
+
+
+def shard_lock_name(index: int) -> str:
+    """Leader-election name held by the live worker that owns claim shard `index`."""
+    return f"{SHARD_LOCK_PREFIX}{index}"
+
+
 async def connect_db():
     url = os.getenv("DATABASE_URL")
     return await asyncpg.connect(url)
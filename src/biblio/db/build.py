@@ -5,20 +5,24 @@ from src.biblio.config.config import connect_db
 
 SCHEMA_PATH = Path(__file__).parent / 'schema.sql'
 MIGRATIONS_DIR = Path(__file__).parent / 'migrations'
+SCHEMA_LOCK_KEY = 4241  # advisory lock; next to the scheduler's leader locks
 
 
 async def build_db():
     conn = await connect_db()
-    schema_sql = SCHEMA_PATH.read_text()
-    await conn.execute(schema_sql)
-
-    if MIGRATIONS_DIR.exists():
-        for migration in sorted(MIGRATIONS_DIR.glob("*.sql")):
-            migration_sql = migration.read_text()
-            await conn.execute(migration_sql)
-            logging.info(f"[DB] Migration applied: {migration.name}")
-
-    await conn.close()
+    try:
+        # bot and every jobs worker build at startup; concurrent DDL can deadlock
+        await conn.execute('SELECT pg_advisory_lock($1)', SCHEMA_LOCK_KEY)
+        schema_sql = SCHEMA_PATH.read_text()
+        await conn.execute(schema_sql)
+
+        if MIGRATIONS_DIR.exists():
+            for migration in sorted(MIGRATIONS_DIR.glob("*.sql")):
+                migration_sql = migration.read_text()
+                await conn.execute(migration_sql)
+                logging.info(f"[DB] Migration applied: {migration.name}")
+    finally:
+        await conn.close()  # also releases the lock
     logging.info('[DB] Schema applied!')
 
 
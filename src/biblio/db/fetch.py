@@ -1,10 +1,37 @@
 import logging
 from datetime import datetime
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
-from pandas import DataFrame
+from src.biblio.config.config import (
+    SHARD_LOCK_PREFIX,
+    Status,
+    connect_db,
+    get_worker_id,
+)
+from src.biblio.db.records import ReservationRecord, SlotPoint, UserRecord
+from src.biblio.utils.scheduler import LEADER_LOCK_NAMESPACE
 
-from src.biblio.config.config import Status, connect_db
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+LEASE_SECONDS = 45
+SHARD_STEAL_SECONDS = 30
+NOTIFY_MAX_ATTEMPTS = 5
+NOTIFY_LEASE_SECONDS = 60
+UNREACHABLE_AFTER_FAILURES = 5  # consecutive failed sends before a chat is skipped
+RESERVATION_VIEW_COLUMNS = """
+        r.id,
+        r.selected_date,
+        r.start_time,
+        r.end_time,
+        r.selected_duration,
+        r.status,
+        r.instant,
+        r.booking_code
+"""
+# reservation times are Rome wall-clock times
+RESERVATION_ENDS_AT = "((r.selected_date + r.end_time) AT TIME ZONE 'Europe/Rome')"
 
 
 async def fetch_setting(key: str) -> str | None:
@@ -18,24 +45,21 @@ async def fetch_setting(key: str) -> str | None:
         await conn.close()
 
 
+async def fetch_bot_state(kind: str) -> dict[str, bytes]:
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch("SELECT key, data FROM bot_state WHERE kind = $1", kind)
+        return {row["key"]: row["data"] for row in rows}
+    finally:
+        await conn.close()
+
+
 async def fetch_user_reservations(
     *user_details, include_date: bool = True
-) -> DataFrame:
+) -> list[ReservationRecord]:
     conn = await connect_db()
-    query = """
-    SELECT
-        r.id AS id,
-        r.selected_date,
-        r.display_date,
-        r.start_time,
-        r.end_time,
-        r.selected_duration,
-        r.display_date,
-        r.status,
-        r.instant,
-        r.booking_code,
-        u.codice_fiscale,
-        u.email
+    query = f"""
+    SELECT {RESERVATION_VIEW_COLUMNS}
     FROM reservations r
     JOIN users u ON r.user_id = u.id
     WHERE u.codice_fiscale = $1
@@ -47,13 +71,66 @@ async def fetch_user_reservations(
 
     rows = await conn.fetch(query, *user_details)
     await conn.close()
-    if not rows:
-        return DataFrame()
-
-    # Convert asyncpg.Record to list of dicts
-    data = [dict(row) for row in rows]
     logging.info("[DB] *user* reservations fetched")
-    return DataFrame(data)
+    return [ReservationRecord(**row) for row in rows]
+
+
+async def fetch_upcoming_reservations(
+    codice_fiscale: str, email: str
+) -> list[ReservationRecord]:
+    """The user's reservations that have not ended yet, soonest first."""
+    conn = await connect_db()
+    query = f"""
+    SELECT {RESERVATION_VIEW_COLUMNS}
+    FROM reservations r
+    JOIN users u ON r.user_id = u.id
+    WHERE u.codice_fiscale = $1
+      AND u.email = $2
+      AND {RESERVATION_ENDS_AT} > now()
+    ORDER BY r.selected_date, r.end_time, r.id
+    """
+    try:
+        rows = await conn.fetch(query, codice_fiscale, email)
+    finally:
+        await conn.close()
+    logging.info(f"[DB] *user* upcoming reservations fetched - {len(rows)} results")
+    return [ReservationRecord(**row) for row in rows]
+
+
+async def fetch_past_reservations(
+    codice_fiscale: str,
+    email: str,
+    before: tuple | None = None,
+    limit: int = 10,
+) -> list[ReservationRecord]:
+    """
+    One page of the user's ended reservations, latest first. `before` is the
+    (selected_date, end_time, id) of the last row of the previous page.
+    """
+    before_date, before_end, before_id = before or (None, None, None)
+    conn = await connect_db()
+    query = f"""
+    SELECT {RESERVATION_VIEW_COLUMNS}
+    FROM reservations r
+    JOIN users u ON r.user_id = u.id
+    WHERE u.codice_fiscale = $1
+      AND u.email = $2
+      AND {RESERVATION_ENDS_AT} <= now()
+      AND (
+        $3::date IS NULL
+        OR (r.selected_date, r.end_time, r.id) < ($3::date, $4::time, $5::uuid)
+      )
+    ORDER BY r.selected_date DESC, r.end_time DESC, r.id DESC
+    LIMIT $6
+    """
+    try:
+        rows = await conn.fetch(
+            query, codice_fiscale, email, before_date, before_end, before_id, limit
+        )
+    finally:
+        await conn.close()
+    logging.info(f"[DB] *user* past reservations fetched - {len(rows)} results")
+    return [ReservationRecord(**row) for row in rows]
 
 
 async def fetch_reservations(statuses: list[str], date=None) -> list[dict]:
@@ -80,7 +157,75 @@ async def fetch_reservations(statuses: list[str], date=None) -> list[dict]:
     return [dict(row) for row in rows] if rows else []
 
 
-async def fetch_all_reservations() -> DataFrame:
+async def fetch_reminder_chat_ids(date, statuses: list[str]) -> list[int]:
+    """
+    Reachable chats without a reservation in `statuses` on `date` — the anti-join of
+    users against that day's reservations, so only the recipients leave the database.
+    """
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch(
+            """
+            SELECT DISTINCT u.chat_id
+            FROM users u
+            WHERE u.blocked_at IS NULL
+              AND u.consecutive_failures < $3
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM reservations r
+                  JOIN users ru ON ru.id = r.user_id
+                  WHERE ru.chat_id = u.chat_id
+                    AND r.selected_date = $1
+                    AND r.status = ANY($2)
+              )
+            """,
+            date,
+            statuses,
+            UNREACHABLE_AFTER_FAILURES,
+        )
+    finally:
+        await conn.close()
+    return [row["chat_id"] for row in rows]
+
+
+async def fetch_reservations_starting_at(
+    date, start_times: list, statuses: list[str]
+) -> list[dict]:
+    """Reservations of reachable chats on `date` that start at one of `start_times`."""
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch(
+            """
+            SELECT u.chat_id,
+                   u.codice_fiscale,
+                   u.name,
+                   r.start_time,
+                   r.end_time,
+                   r.selected_duration,
+                   r.booking_code
+            FROM reservations r
+            JOIN users u ON u.id = r.user_id
+            WHERE r.selected_date = $1
+              AND r.start_time = ANY($2)
+              AND r.status = ANY($3)
+              AND u.blocked_at IS NULL
+              AND u.consecutive_failures < $4
+            ORDER BY r.start_time, u.chat_id
+            """,
+            date,
+            start_times,
+            statuses,
+            UNREACHABLE_AFTER_FAILURES,
+        )
+    finally:
+        await conn.close()
+    logging.info(f"[DB] Reservations starting at {start_times} fetched - {len(rows)}")
+    return [dict(row) for row in rows]
+
+
+async def fetch_all_reservations() -> "DataFrame":
+    from pandas import DataFrame  # backups only
+
     conn = await connect_db()
     query = """
     SELECT 
@@ -146,17 +291,38 @@ async def fetch_all_reservations() -> DataFrame:
     return DataFrame(data)
 
 
-async def claim_reservations(limit: int = 10, date=None) -> list[dict]:
+async def claim_reservations(
+    limit: int = 10,
+    date=None,
+    lease_seconds: int = LEASE_SECONDS,
+    shard: tuple[int, int] | None = None,
+) -> list[dict]:
     """
-    Atomically claim up to `limit` reservations for processing by setting status=processing.
+    Atomically claim up to `limit` due reservations for processing by setting status=processing.
+    Rows whose `next_attempt_at` lies in the future are left for a later tick. Rows still
+    processing under an expired lease (crashed worker) are claimed again.
+    Claimed rows carry this worker's id and a lease that the heartbeat must keep extending.
+    With `shard=(index, count)` only users hashing to `index` are claimed, so one user's
+    retries stay on one worker. Another worker takes a row only once it has been due for
+    SHARD_STEAL_SECONDS and no live worker holds the owning shard's election lock, so a
+    dead worker's shard does not stall but a live one keeps its retries.
     Returns the claimed rows joined with user info.
     """
+    shard_index, shard_count = shard or (0, 1)
     if date is None:
         date = datetime.now(ZoneInfo("Europe/Rome")).date()
 
     conn = await connect_db()
     query = """
-    WITH cte AS (
+    WITH live_shards AS (
+        SELECT l.objid::bigint AS lock_key
+        FROM pg_locks l
+        WHERE l.locktype = 'advisory'
+          AND l.granted
+          AND l.objsubid = 2
+          AND l.classid::bigint = $10
+    ),
+    cte AS (
         SELECT r.id,
                u.codice_fiscale,
                u.priority,
@@ -166,7 +332,21 @@ async def claim_reservations(limit: int = 10, date=None) -> list[dict]:
         FROM reservations r
         JOIN users u ON u.id = r.user_id
         WHERE r.selected_date = $2
-          AND r.status = ANY($1)
+          AND (
+              r.status = ANY($1)
+              OR (r.status = $4 AND r.lease_expires_at < now())
+          )
+          AND (r.next_attempt_at IS NULL OR r.next_attempt_at <= now())
+          AND (
+              (hashtext(r.user_id::text) & 2147483647) % $8 = $7
+              OR (
+                  COALESCE(r.next_attempt_at, r.updated_at)
+                      < now() - make_interval(secs => $9)
+                  AND hashtext(
+                      $11 || ((hashtext(r.user_id::text) & 2147483647) % $8)::text
+                  )::bigint & 4294967295 NOT IN (SELECT lock_key FROM live_shards)
+              )
+          )
         ORDER BY r.created_at ASC
         LIMIT $3
         FOR UPDATE SKIP LOCKED
@@ -175,7 +355,9 @@ async def claim_reservations(limit: int = 10, date=None) -> list[dict]:
     SET status = $4,
         status_change = TRUE,
         updated_at = CURRENT_TIMESTAMP,
-        processed_at = CURRENT_TIMESTAMP
+        processed_at = CURRENT_TIMESTAMP,
+        claimed_by = $5,
+        lease_expires_at = now() + make_interval(secs => $6)
     FROM cte
     WHERE r.id = cte.id
     RETURNING r.*,
@@ -195,12 +377,104 @@ async def claim_reservations(limit: int = 10, date=None) -> list[dict]:
         date,
         limit,
         Status.PROCESSING,
+        get_worker_id(),
+        lease_seconds,
+        shard_index,
+        shard_count,
+        SHARD_STEAL_SECONDS,
+        LEADER_LOCK_NAMESPACE,
+        SHARD_LOCK_PREFIX,
     )
     await conn.close()
     logging.info(f"[DB] Claimed {len(rows)} reservations for processing")
     return [dict(row) for row in rows] if rows else []
 
 
+async def claim_notifications(
+    limit: int = 50,
+    max_attempts: int = NOTIFY_MAX_ATTEMPTS,
+    lease_seconds: int = NOTIFY_LEASE_SECONDS,
+) -> list[dict]:
+    """
+    Claim up to `limit` undelivered reservation notifications, oldest first.
+    Claimed rows are hidden from other dispatchers for `lease_seconds`, so a dispatcher
+    that dies mid-batch only delays its messages. Rows that failed `max_attempts`
+    times are left alone.
+    """
+    conn = await connect_db()
+    query = """
+    WITH cte AS (
+        SELECT r.id, u.chat_id
+        FROM reservations r
+        JOIN users u ON u.id = r.user_id
+        WHERE r.notification_text IS NOT NULL
+          AND NOT r.notified
+          AND r.notify_attempts < $2
+          AND u.blocked_at IS NULL
+          AND (r.notify_after IS NULL OR r.notify_after <= now())
+        ORDER BY r.updated_at ASC
+        LIMIT $1
+        FOR UPDATE OF r SKIP LOCKED
+    )
+    UPDATE reservations r
+    SET notify_after = now() + make_interval(secs => $3)
+    FROM cte
+    WHERE r.id = cte.id
+    RETURNING r.id, r.notification_text, r.notify_attempts, cte.chat_id
+    """
+    try:
+        rows = await conn.fetch(query, limit, max_attempts, lease_seconds)
+    finally:
+        await conn.close()
+    return [dict(row) for row in rows]
+
+
+async def claim_broadcasts(lease_seconds: int) -> list[dict]:
+    """
+    Claim unfinished broadcasts whose sender stopped extending the lease (redeploy or
+    crash), so they resume where they left off.
+    """
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch(
+            """
+            UPDATE broadcasts
+            SET claimed_by = $1,
+                lease_expires_at = now() + make_interval(secs => $2)
+            WHERE finished_at IS NULL
+              AND (lease_expires_at IS NULL OR lease_expires_at < now())
+            RETURNING *
+            """,
+            get_worker_id(),
+            lease_seconds,
+        )
+    finally:
+        await conn.close()
+    return [dict(row) for row in rows]
+
+
+async def fetch_broadcast_recipients(broadcast_id: str, limit: int) -> list[dict]:
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch(
+            """
+            SELECT r.position, r.chat_id, COALESCE(r.texts, b.texts) AS texts
+            FROM broadcast_recipients r
+            JOIN broadcasts b ON b.id = r.broadcast_id
+            WHERE r.broadcast_id = $1
+              AND r.delivered_at IS NULL
+              AND r.error IS NULL
+            ORDER BY r.position
+            LIMIT $2
+            """,
+            broadcast_id,
+            limit,
+        )
+    finally:
+        await conn.close()
+    return [dict(row) for row in rows]
+
+
 async def fetch_reservation_by_id(reservation_id: str) -> dict | None:
     conn = await connect_db()
     query = """
@@ -214,15 +488,24 @@ async def fetch_reservation_by_id(reservation_id: str) -> dict | None:
 
 
 async def fetch_all_user_chat_ids() -> list[str]:
+    """Chat ids of every user the bot can still reach."""
     conn = await connect_db()
     try:
-        rows = await conn.fetch("SELECT DISTINCT chat_id FROM users")
+        rows = await conn.fetch(
+            """
+            SELECT DISTINCT chat_id
+            FROM users
+            WHERE blocked_at IS NULL
+              AND consecutive_failures < $1
+            """,
+            UNREACHABLE_AFTER_FAILURES,
+        )
         return [row["chat_id"] for row in rows]
     finally:
         await conn.close()
 
 
-async def fetch_existing_user(chat_id: str) -> dict | None:
+async def fetch_existing_user(chat_id: str) -> UserRecord | None:
     conn = await connect_db()
     query = """
     SELECT 
@@ -236,10 +519,13 @@ async def fetch_existing_user(chat_id: str) -> dict | None:
     """
     row = await conn.fetchrow(query, chat_id)
     await conn.close()
-    return row
+    return UserRecord(**row) if row else None
 
 
-async def fetch_slot_history(date: str) -> DataFrame | None:
+async def fetch_slot_history(
+    date: str, since: datetime | None = None
+) -> list[SlotPoint]:
+    """Snapshots of `date`; with `since`, only those taken after it."""
     if isinstance(date, str):
         date = datetime.strptime(date, "%Y-%m-%d").date()
 
@@ -250,14 +536,10 @@ async def fetch_slot_history(date: str) -> DataFrame | None:
         available
     FROM slots
     WHERE job_timestamp::date = $1
+        AND ($2::timestamptz IS NULL OR job_timestamp > $2)
     ORDER BY slot ASC, job_timestamp ASC
     """
-    rows = await conn.fetch(query, date)
+    rows = await conn.fetch(query, date, since)
     await conn.close()
     logging.info(f"[DB] available slots fetched - {len(rows)} results")
-    result = (
-        DataFrame(rows, columns=["job_timestamp", "slot", "available"])
-        if rows
-        else None
-    )
-    return result
+    return [SlotPoint(**row) for row in rows]
@@ -5,7 +5,7 @@ from zoneinfo import ZoneInfo
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.biblio.config.config import UserDataKey, connect_db
+from src.biblio.config.config import UserDataKey, connect_db, get_worker_id
 
 
 async def writer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -100,6 +100,48 @@ async def insert_slots(slots: dict[str, int]) -> None:
         await conn.close()
 
 
+async def insert_broadcast(
+    broadcast_id: str,
+    texts: list[str],
+    recipients: list[tuple[int, list[str] | None]],
+    lease_seconds: int,
+) -> bool:
+    """
+    Store a broadcast and its recipients, claimed by this worker. Returns False when a
+    broadcast with the same id already exists, so re-running a job never sends twice.
+    """
+    conn = await connect_db()
+    try:
+        async with conn.transaction():
+            created = await conn.fetchval(
+                """
+                INSERT INTO broadcasts (id, texts, total, claimed_by, lease_expires_at)
+                VALUES ($1, $2, $3, $4, now() + make_interval(secs => $5))
+                ON CONFLICT (id) DO NOTHING
+                RETURNING id
+                """,
+                broadcast_id,
+                texts,
+                len(recipients),
+                get_worker_id(),
+                lease_seconds,
+            )
+            if created is None:
+                return False
+            await conn.copy_records_to_table(
+                'broadcast_recipients',
+                records=[
+                    (broadcast_id, position, chat_id, chat_texts)
+                    for position, (chat_id, chat_texts) in enumerate(recipients)
+                ],
+                columns=['broadcast_id', 'position', 'chat_id', 'texts'],
+            )
+        logging.info(f'[DB] Broadcast {broadcast_id} stored for {len(recipients)} chats')
+        return True
+    finally:
+        await conn.close()
+
+
 def _prepare_insert_parts(data: dict):
     columns = ', '.join(data.keys())
     placeholders = ', '.join(f'${i}' for i in range(1, len(data) + 1))
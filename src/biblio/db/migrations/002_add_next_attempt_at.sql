@@ -0,0 +1,7 @@
+ALTER TABLE IF EXISTS reservations
+ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ,
+ADD COLUMN IF NOT EXISTS last_failure VARCHAR(20);
+
+CREATE INDEX IF NOT EXISTS idx_reservations_due
+ON reservations (selected_date, next_attempt_at)
+WHERE status IN ('pending', 'retrying', 'awaiting');
@@ -0,0 +1,7 @@
+ALTER TABLE IF EXISTS reservations
+ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_reservations_lease
+ON reservations (lease_expires_at)
+WHERE status = 'processing';
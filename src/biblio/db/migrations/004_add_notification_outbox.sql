@@ -0,0 +1,8 @@
+ALTER TABLE IF EXISTS reservations
+ADD COLUMN IF NOT EXISTS notification_text TEXT,
+ADD COLUMN IF NOT EXISTS notify_attempts INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS notify_after TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_reservations_outbox
+ON reservations (notify_after)
+WHERE notification_text IS NOT NULL AND NOT notified;
@@ -0,0 +1,4 @@
+ALTER TABLE IF EXISTS users
+ADD COLUMN IF NOT EXISTS blocked_at TIMESTAMPTZ,
+ADD COLUMN IF NOT EXISTS last_error TEXT,
+ADD COLUMN IF NOT EXISTS consecutive_failures INTEGER NOT NULL DEFAULT 0;
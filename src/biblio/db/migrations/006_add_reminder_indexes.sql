@@ -0,0 +1,8 @@
+CREATE INDEX IF NOT EXISTS idx_reservations_date_status_start
+ON reservations (selected_date, status, start_time);
+
+CREATE INDEX IF NOT EXISTS idx_reservations_user_id
+ON reservations (user_id);
+
+CREATE INDEX IF NOT EXISTS idx_users_chat_id
+ON users (chat_id);
@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS idx_reservations_user_date_end
+ON reservations (user_id, selected_date, end_time, id);
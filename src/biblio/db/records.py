@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from uuid import UUID
+
+
+@dataclass(slots=True, frozen=True)
+class ReservationRecord:
+    """A reservation as listed to its user; times are Rome wall-clock times."""
+
+    id: UUID
+    selected_date: date
+    start_time: time
+    end_time: time
+    selected_duration: int
+    status: str
+    instant: bool | None
+    booking_code: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class UserRecord:
+    id: UUID
+    codice_fiscale: str
+    name: str
+    email: str
+    priority: int | None
+
+
+@dataclass(slots=True, frozen=True)
+class SlotPoint:
+    """Seats left in a slot at one availability snapshot."""
+
+    job_timestamp: datetime
+    slot: str
+    available: int
@@ -11,6 +11,9 @@ CREATE TABLE IF NOT EXISTS users (
     name TEXT,
     email TEXT,
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    blocked_at TIMESTAMPTZ,
+    last_error TEXT,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
 
     UNIQUE (codice_fiscale, email, name) 
 );
@@ -34,9 +37,16 @@ CREATE TABLE IF NOT EXISTS reservations (
     fail_at TIMESTAMPTZ,
     terminated_at TIMESTAMPTZ,
     canceled_at TIMESTAMPTZ,
+    next_attempt_at TIMESTAMPTZ,
+    last_failure VARCHAR(20),
+    claimed_by TEXT,
+    lease_expires_at TIMESTAMPTZ,
     instant BOOLEAN DEFAULT FALSE,
     status_change BOOLEAN DEFAULT FALSE,
-    notified BOOLEAN DEFAULT FALSE
+    notified BOOLEAN DEFAULT FALSE,
+    notification_text TEXT,
+    notify_attempts INTEGER DEFAULT 0,
+    notify_after TIMESTAMPTZ
 );
 
 CREATE TABLE IF NOT EXISTS slots (
@@ -51,3 +61,39 @@ CREATE TABLE IF NOT EXISTS settings (
   value text NOT NULL,
   updated_at timestamptz DEFAULT now()
 );
+
+CREATE TABLE IF NOT EXISTS bot_state (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data BYTEA NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (kind, key)
+);
+
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id TEXT PRIMARY KEY,
+    texts TEXT[] NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    lease_expires_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS broadcast_recipients (
+    broadcast_id TEXT REFERENCES broadcasts(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    chat_id BIGINT NOT NULL,
+    texts TEXT[],
+    delivered_at TIMESTAMPTZ,
+    error TEXT,
+
+    PRIMARY KEY (broadcast_id, position)
+);
+
+CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_pending
+ON broadcast_recipients (broadcast_id, position)
+WHERE delivered_at IS NULL AND error IS NULL;
@@ -6,6 +6,7 @@ from src.biblio.config.config import (
     Status,
     connect_db,
     get_priorities,
+    get_worker_id,
 )
 
 
@@ -25,6 +26,31 @@ async def upsert_setting(key: str, value: str) -> None:
         await conn.close()
 
 
+async def write_bot_state(
+    upserts: list[tuple[str, str, bytes]], deletes: list[tuple[str, str]]
+) -> None:
+    """Apply a batch of (kind, key, data) upserts and (kind, key) deletes at once."""
+    conn = await connect_db()
+    try:
+        async with conn.transaction():
+            if upserts:
+                await conn.executemany(
+                    """
+                    INSERT INTO bot_state (kind, key, data)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (kind, key) DO UPDATE
+                    SET data = EXCLUDED.data, updated_at = CURRENT_TIMESTAMP
+                    """,
+                    upserts,
+                )
+            if deletes:
+                await conn.executemany(
+                    "DELETE FROM bot_state WHERE kind = $1 AND key = $2", deletes
+                )
+    finally:
+        await conn.close()
+
+
 async def update_cancel_status(reservation_id: str) -> None:
     conn = await connect_db()
     query = """
@@ -93,12 +119,277 @@ async def sync_user_priorities() -> int:
         await conn.close()
 
 
+async def extend_leases(
+    reservation_ids: list, worker_id: str, lease_seconds: int
+) -> set:
+    """Push the lease of rows still claimed by `worker_id`; returns the ids extended."""
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch(
+            """
+            UPDATE reservations
+            SET lease_expires_at = now() + make_interval(secs => $3)
+            WHERE id = ANY($1)
+              AND claimed_by = $2
+              AND status = $4
+            RETURNING id
+            """,
+            reservation_ids,
+            worker_id,
+            lease_seconds,
+            Status.PROCESSING,
+        )
+    finally:
+        await conn.close()
+    return {row["id"] for row in rows}
+
+
+async def release_claims(worker_id: str) -> list:
+    """Hand every row still processing under `worker_id` back to the queue, due now."""
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch(
+            """
+            UPDATE reservations
+            SET status = CASE WHEN retries = 0 THEN $3 ELSE $4 END,
+                status_change = TRUE,
+                updated_at = CURRENT_TIMESTAMP,
+                claimed_by = NULL,
+                lease_expires_at = NULL,
+                next_attempt_at = NULL
+            WHERE claimed_by = $1
+              AND status = $2
+            RETURNING id
+            """,
+            worker_id,
+            Status.PROCESSING,
+            Status.PENDING,
+            Status.FAIL,
+        )
+    finally:
+        await conn.close()
+    if rows:
+        logging.info(f"[DB] Released {len(rows)} claims of worker {worker_id}")
+    return [row["id"] for row in rows]
+
+
+async def mark_notifications(
+    delivered: list,
+    deferred: list[tuple],
+    dropped: list,
+    max_attempts: int,
+) -> None:
+    """
+    Record one dispatch batch in a single transaction: `delivered` ids are marked
+    notified, `deferred` (id, delay seconds) pairs count a failed send and wait before
+    the next one, and `dropped` ids are never tried again.
+    """
+    conn = await connect_db()
+    try:
+        async with conn.transaction():
+            if delivered:
+                await conn.execute(
+                    """
+                    UPDATE reservations
+                    SET notified = TRUE,
+                        notify_after = NULL
+                    WHERE id = ANY($1)
+                    """,
+                    delivered,
+                )
+            if deferred:
+                await conn.executemany(
+                    """
+                    UPDATE reservations
+                    SET notify_attempts = notify_attempts + 1,
+                        notify_after = now() + make_interval(secs => $2)
+                    WHERE id = $1
+                    """,
+                    deferred,
+                )
+            if dropped:
+                await conn.execute(
+                    """
+                    UPDATE reservations
+                    SET notify_attempts = $2,
+                        notify_after = NULL
+                    WHERE id = ANY($1)
+                    """,
+                    dropped,
+                    max_attempts,
+                )
+    finally:
+        await conn.close()
+
+
+async def record_broadcast_progress(
+    broadcast_id: str,
+    delivered: list[int],
+    failed: list[tuple[int, str]],
+    lease_seconds: int,
+) -> bool:
+    """
+    Mark one chunk of recipients as delivered or failed (position, error) and extend
+    the lease. Returns False when another worker has taken the broadcast over.
+    """
+    conn = await connect_db()
+    try:
+        async with conn.transaction():
+            owned = await conn.fetchval(
+                """
+                UPDATE broadcasts
+                SET sent = sent + $2,
+                    failed = failed + $3,
+                    lease_expires_at = now() + make_interval(secs => $4)
+                WHERE id = $1
+                  AND claimed_by = $5
+                RETURNING id
+                """,
+                broadcast_id,
+                len(delivered),
+                len(failed),
+                lease_seconds,
+                get_worker_id(),
+            )
+            if owned is None:
+                return False
+            await conn.execute(
+                """
+                UPDATE broadcast_recipients
+                SET delivered_at = CURRENT_TIMESTAMP
+                WHERE broadcast_id = $1
+                  AND position = ANY($2)
+                """,
+                broadcast_id,
+                delivered,
+            )
+            if failed:
+                await conn.executemany(
+                    """
+                    UPDATE broadcast_recipients
+                    SET error = $3
+                    WHERE broadcast_id = $1
+                      AND position = $2
+                    """,
+                    [(broadcast_id, position, error) for position, error in failed],
+                )
+        return True
+    finally:
+        await conn.close()
+
+
+async def finish_broadcast(broadcast_id: str) -> dict | None:
+    conn = await connect_db()
+    try:
+        row = await conn.fetchrow(
+            """
+            UPDATE broadcasts
+            SET finished_at = CURRENT_TIMESTAMP,
+                claimed_by = NULL,
+                lease_expires_at = NULL
+            WHERE id = $1
+              AND claimed_by = $2
+            RETURNING total, sent, failed
+            """,
+            broadcast_id,
+            get_worker_id(),
+        )
+    finally:
+        await conn.close()
+    return dict(row) if row else None
+
+
+async def release_broadcasts() -> list:
+    """Expire the leases of this worker's unfinished broadcasts so they resume now."""
+    conn = await connect_db()
+    try:
+        rows = await conn.fetch(
+            """
+            UPDATE broadcasts
+            SET claimed_by = NULL,
+                lease_expires_at = NULL
+            WHERE claimed_by = $1
+              AND finished_at IS NULL
+            RETURNING id
+            """,
+            get_worker_id(),
+        )
+    finally:
+        await conn.close()
+    return [row["id"] for row in rows]
+
+
+async def record_delivery_results(
+    delivered: list[int], failures: list[tuple[int, str, bool]]
+) -> None:
+    """
+    Keep the delivery state of chats current after a batch of sends. `failures` holds
+    (chat_id, error, blocked) triples of sends that failed because of the chat itself;
+    blocked chats are skipped until the user sends /start again, other failures count
+    towards UNREACHABLE_AFTER_FAILURES.
+    """
+    if not delivered and not failures:
+        return
+    conn = await connect_db()
+    try:
+        async with conn.transaction():
+            if delivered:
+                await conn.execute(
+                    """
+                    UPDATE users
+                    SET consecutive_failures = 0,
+                        last_error = NULL
+                    WHERE chat_id = ANY($1)
+                      AND consecutive_failures > 0
+                    """,
+                    delivered,
+                )
+            if failures:
+                await conn.executemany(
+                    """
+                    UPDATE users
+                    SET consecutive_failures = consecutive_failures + 1,
+                        last_error = $2,
+                        blocked_at = CASE
+                            WHEN $3 THEN COALESCE(blocked_at, CURRENT_TIMESTAMP)
+                            ELSE blocked_at
+                        END
+                    WHERE chat_id = $1
+                    """,
+                    failures,
+                )
+    finally:
+        await conn.close()
+    blocked = sum(1 for *_, is_blocked in failures if is_blocked)
+    if blocked:
+        logging.info(f"[DB] Marked {blocked} chats as unreachable")
+
+
+async def reset_delivery_state(chat_id: int) -> None:
+    conn = await connect_db()
+    try:
+        await conn.execute(
+            """
+            UPDATE users
+            SET blocked_at = NULL,
+                last_error = NULL,
+                consecutive_failures = 0
+            WHERE chat_id = $1
+              AND (blocked_at IS NOT NULL OR consecutive_failures > 0)
+            """,
+            chat_id,
+        )
+    finally:
+        await conn.close()
+
+
 async def sweep_stuck_reservations(
     stale_minutes: int = 5,
     activation_grace_minutes: int = 30,
 ) -> list[dict]:
     """
-    Reset reservations stuck in processing/awaiting_confirmation beyond stale_minutes.
+    Reset processing reservations whose worker lease has expired (crashed or killed worker).
+    Rows claimed before leases existed fall back to the stale_minutes rule.
     If the slot start + activation_grace_minutes has passed, terminate; otherwise mark fail. normal processing will pick them up.
     """
     conn = await connect_db()
@@ -124,9 +415,17 @@ async def sweep_stuck_reservations(
                  AT TIME ZONE 'Europe/Rome' + make_interval(mins => $2) < now() AT TIME ZONE 'Europe/Rome'
               THEN CURRENT_TIMESTAMP
             ELSE r.terminated_at
-        END
-    WHERE r.status IN ($5, $6)
-      AND r.updated_at < now() - make_interval(mins => $1)
+        END,
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE r.status = $5
+      AND (
+          r.lease_expires_at < now()
+          OR (
+              r.lease_expires_at IS NULL
+              AND r.updated_at < now() - make_interval(mins => $1)
+          )
+      )
     RETURNING id, status, retries
     """
     rows = await conn.fetch(
@@ -136,7 +435,6 @@ async def sweep_stuck_reservations(
         Status.TERMINATED,
         Status.FAIL,
         Status.PROCESSING,
-        Status.AWAITING,
     )
     await conn.close()
     if rows:
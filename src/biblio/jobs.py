@@ -1,47 +1,110 @@
 import asyncio
 import logging
+import random
+import statistics
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
-import aiocron
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import httpx
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from httpx import ReadTimeout
-from pygsheets import Worksheet
 from telegram import Bot
 
 from src.biblio.bot.messages import show_notification
 from src.biblio.config.config import (
     DEFAULT_PRIORITY,
     BookingCodeStatus,
+    FailureReason,
     ReservationConfirmationConflict,
     Schedule,
     Status,
+    get_launch_timing,
     get_wks,
+    get_worker_concurrency,
+    get_worker_id,
+    get_worker_shard,
+    shard_lock_name,
+)
+from src.biblio.db.fetch import (
+    LEASE_SECONDS,
+    claim_reservations,
+    fetch_all_reservations,
 )
-from src.biblio.db.fetch import claim_reservations, fetch_all_reservations
 from src.biblio.db.insert import insert_slots
-from src.biblio.db.update import sweep_stuck_reservations, update_record
+from src.biblio.db.update import (
+    extend_leases,
+    release_claims,
+    sweep_stuck_reservations,
+    update_record,
+)
+from src.biblio.reservation.availability import AVAILABILITY_CACHE, free_seats
+from src.biblio.reservation.clock import UPSTREAM_CLOCK, log_clock_offset
+from src.biblio.reservation.confirm_timing import CONFIRM_TIMING
 from src.biblio.reservation.reservation import (
+    acquire_recaptcha_token,
+    build_reservation_payload,
+    build_upstream_headers,
     calculate_timeout,
+    clamp_timeout,
     confirm_reservation,
-    get_available_slots,
+    get_cookie_header,
+    open_upstream_client,
+    release_recaptcha_token,
+    send_reservation,
     set_reservation,
+    time_left,
+    warm_upstream,
+)
+from src.biblio.reservation.retry_policy import classify_failure, next_attempt_at
+from src.biblio.reservation.slot_datetime import (
+    current_boundary,
+    next_boundary,
+    reserve_datetime,
 )
-from src.biblio.reservation.slot_datetime import reserve_datetime
 from src.biblio.utils.notif import (
+    dispatch_notifications,
     notify_donation,
     notify_reminder,
     notify_reservation_activation,
 )
+from src.biblio.utils.pipeline import Pipeline, Stage
+from src.biblio.utils.scheduler import JobScheduler
+from src.biblio.utils.validation import validate_user_data
+
+if TYPE_CHECKING:
+    from pygsheets import Worksheet
 
 JOB_SCHEDULE = Schedule.jobs(daylight_saving=True)
-SEMAPHORE_LIMIT = 5
+LAUNCH_SPIN_SECONDS = 0.05
+LAUNCH_CLAIM_FACTOR = 4  # claims per unit of WORKER_CONCURRENCY
+LAUNCH_WARMUP_SECONDS = 2  # within httpx's keep-alive expiry
+LAUNCH_COOKIE_MARGIN_SECONDS = 5  # the cookie login must end this far before boundary
 RETRY_LIMIT = 5
 PRIORITY_RETRY_LIMIT = 20
 RETRY_NOTIF_INTERVAL = int(PRIORITY_RETRY_LIMIT / 2 + 1)
-semaphore = asyncio.Semaphore(SEMAPHORE_LIMIT)
+CAPTCHA_WORKERS_FACTOR = 2  # solves mostly wait on 2captcha polling
+STAGE_QUEUE_FACTOR = 2
+ATTEMPT_BUDGET = 120  # seconds after the boundary; later the seats are gone
+PRIORITY_ATTEMPT_BUDGET = 240
+ATTEMPT_MIN_BUDGET = 60  # for attempts claimed long after their boundary
+LEASE_HEARTBEAT_SECONDS = LEASE_SECONDS // 3
+_pipeline: Pipeline | None = None
+_leased: set = set()  # ids of rows claimed by this worker and still in flight
+_stored_attempts: dict = {}  # id -> attempt holding a stored entry, not yet persisted
+_claiming_tasks: set[asyncio.Task] = set()  # launcher and claim runs, cancelled on drain
+_upstream_clients: set[httpx.AsyncClient] = set()  # open launcher connections
+SCHEDULER = JobScheduler()
+_draining = False
+DRAIN_SECONDS = 20
+NOTIFY_INTERVAL_SECONDS = 3
+_last_slot_snapshot = 0.0
 
 
 def _is_priority_user(record: dict) -> bool:
@@ -57,26 +120,112 @@ def _set_retry_limit(record: dict) -> int:
     return retry_limit
 
 
-async def process_reservation(record: dict, bot: Bot) -> dict:
-    chat_id = record.get("chat_id")
-    user = {
-        "codice_fiscale": record["codice_fiscale"],
-        "cognome_nome": record["name"],
-        "email": record["email"],
-    }
-    retries = int(record["retries"])
-    process_start = time.perf_counter()
-    now_ts = datetime.now(ZoneInfo("Europe/Rome"))
+def _failed_status(record: dict, retries: int) -> str:
+    """Status of an attempt that failed with `retries` earlier failures."""
+    return Status.TERMINATED if retries + 1 > _set_retry_limit(record) else Status.FAIL
+
+
+def _attempt_deadline(record: dict, boundary_ts: float) -> float:
+    budget = PRIORITY_ATTEMPT_BUDGET if _is_priority_user(record) else ATTEMPT_BUDGET
+    return max(boundary_ts + budget, time.time() + ATTEMPT_MIN_BUDGET)
+
+
+@dataclass
+class ReservationAttempt:
+    record: dict
+    retries: int
+    start: int | None = None
+    end: int | None = None
+    duration: int | None = None
+    token: str | None = None
+    token_acquired_at: float = 0.0
+    payload: dict | None = None
+    headers: dict | None = None
+    booking_code: str | None = None
+    entry: str | None = None
+    stored_at: float | None = None  # perf_counter when entry/store answered
+    deadline: float | None = None  # epoch seconds; work past it is cancelled
+    result: dict | None = None  # set once the attempt is finalized
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def user(self) -> dict:
+        return {
+            "codice_fiscale": self.record["codice_fiscale"],
+            "cognome_nome": self.record["name"],
+            "email": self.record["email"],
+        }
+
+    @classmethod
+    def claimed(cls, record: dict, boundary_ts: float) -> "ReservationAttempt":
+        return cls(
+            record=record,
+            retries=int(record["retries"]),
+            deadline=_attempt_deadline(record, boundary_ts),
+        )
+
+
+async def process_reservation(record: dict) -> dict:
+    attempt = ReservationAttempt.claimed(
+        record, current_boundary(UPSTREAM_CLOCK.now()).timestamp()
+    )
+    for stage in (_captcha_stage, _store_stage, _confirm_stage):
+        attempt = await _within_deadline(stage, attempt)
+        if attempt.result is not None:
+            break
+    return attempt.result
+
+
+async def _within_deadline(
+    stage: Callable[[ReservationAttempt], Awaitable[ReservationAttempt]],
+    attempt: ReservationAttempt,
+) -> ReservationAttempt:
+    """
+    Run one stage of the attempt under its deadline. Expired attempts are finalized as
+    a timed-out retry instead of holding a worker for a slot that is already gone.
+    """
+    record = attempt.record
+    try:
+        remaining = time_left(attempt.deadline)
+    except TimeoutError:
+        if attempt.token and not attempt.entry:  # expired while queued, token unspent
+            release_recaptcha_token(attempt.token, attempt.token_acquired_at)
+    else:
+        try:
+            async with asyncio.timeout(remaining):
+                return await stage(attempt)
+        except TimeoutError:
+            pass
+    if attempt.result is not None:  # deadline hit while finalizing
+        return attempt
+
+    stage_name = getattr(stage, "func", stage).__name__.strip("_")
+    logging.warning(f"[JOB] ⌛ Deadline passed for ID {record['id']} at {stage_name}")
+    if attempt.entry:  # stored; the confirm is still owed
+        return await _finish(
+            attempt,
+            Status.AWAITING,
+            attempt.booking_code,
+            reason=FailureReason.DEADLINE,
+        )
+    return await _finish(
+        attempt,
+        Status.FAIL,
+        retries=attempt.retries + 1,
+        reason=FailureReason.DEADLINE,
+    )
+
 
+async def _captcha_stage(
+    attempt: ReservationAttempt, gate: bool = True
+) -> ReservationAttempt:
+    record = attempt.record
     if _is_stale_fail(record):
-        return await _finalize(
-            record,
+        return await _finish(
+            attempt,
             Status.TERMINATED,
             BookingCodeStatus.CLOSED,
-            retries,
-            chat_id,
-            bot,
-            terminated_at=now_ts,
+            terminated_at=datetime.now(ZoneInfo("Europe/Rome")),
         )
 
     reserve_start = time.perf_counter()
@@ -85,60 +234,133 @@ async def process_reservation(record: dict, bot: Bot) -> dict:
         f"[RESERVE] 1️⃣ ⏱️ Reserve phase took {time.perf_counter() - reserve_start:.2f}s for ID {record['id']}"
     )
     if start is None:
-        return await _finalize(
-            record,
+        return await _finish(
+            attempt,
             Status.FAIL,
-            record["booking_code"],
-            retries + 1,
-            chat_id,
-            bot,
+            retries=attempt.retries + 1,
+            reason=FailureReason.INVALID,
         )
+    attempt.start, attempt.end, attempt.duration = start, end, duration
+
+    if gate and not await _availability_phase(record, duration, attempt.deadline):
+        return await _finish(
+            attempt,
+            Status.PENDING if attempt.retries == 0 else Status.FAIL,
+            notify=False,  # deferred, not attempted
+            reason=FailureReason.NO_SEATS,
+        )
+
+    try:
+        validate_user_data(attempt.user)
+        attempt.token = await acquire_recaptcha_token(record, deadline=attempt.deadline)
+        attempt.token_acquired_at = time.time()
+    except TimeoutError:
+        if attempt.deadline is not None and time.time() >= attempt.deadline:
+            raise  # budget spent, not a captcha failure; finalized as DEADLINE
+        logging.error(f"[JOB_CAPTCHA] 🧩 ❌ Captcha solve timed out for ID {record['id']}")
+        return await _finish(
+            attempt,
+            _failed_status(record, attempt.retries),
+            retries=attempt.retries + 1,
+            reason=FailureReason.CAPTCHA,
+        )
+    except Exception as e:
+        logging.error(f"[JOB_CAPTCHA] 🧩 ❌ No captcha token for ID {record['id']}: {e}")
+        return await _finish(
+            attempt,
+            _failed_status(record, attempt.retries),
+            retries=attempt.retries + 1,
+            reason=(
+                FailureReason.INVALID
+                if isinstance(e, ValueError)
+                else FailureReason.CAPTCHA
+            ),
+        )
+    return attempt
+
 
+async def _store_stage(attempt: ReservationAttempt) -> ReservationAttempt:
+    record = attempt.record
     set_start = time.perf_counter()
-    booking_code, entry, set_status = await _set_phase(
-        record, start, end, duration, user, retries
+    booking_code, entry, set_status, reason = await _set_phase(
+        record,
+        attempt.start,
+        attempt.end,
+        attempt.duration,
+        attempt.user,
+        attempt.retries,
+        recaptcha_token=attempt.token,
+        deadline=attempt.deadline,
     )
     logging.info(
         f"[SET] 2️⃣ ⏱️ Set phase took {time.perf_counter() - set_start:.2f}s for ID {record['id']}"
     )
+    return await _stored(attempt, booking_code, entry, set_status, reason)
+
+
+async def _stored(
+    attempt: ReservationAttempt,
+    booking_code: str | None,
+    entry: str | None,
+    set_status: str | None,
+    reason: FailureReason | None = None,
+) -> ReservationAttempt:
     if set_status:  # existing/fail/terminated decided in set phase
-        result = await _finalize(
-            record,
+        return await _finish(
+            attempt,
             set_status,
             booking_code,
-            retries + (set_status == Status.FAIL),
-            chat_id,
-            bot,
+            attempt.retries + (set_status == Status.FAIL),
+            reason=reason,
         )
-        process_end = time.perf_counter()
-        logging.info(
-            f"[JOB] 🕒 Process for ID {record['id']} took {process_end - process_start:.2f}s"
-        )
-        return result
+    attempt.booking_code, attempt.entry = booking_code, entry
+    attempt.stored_at = time.perf_counter()
+    _stored_attempts[attempt.record["id"]] = attempt
+    return attempt
 
-    await asyncio.sleep(1)
 
+async def _confirm_stage(attempt: ReservationAttempt) -> ReservationAttempt:
+    record = attempt.record
     confirm_start = time.perf_counter()
-    confirm_status = await _confirm_phase(record, entry, retries)
+    confirm_status = await _confirm_phase(
+        record, attempt.entry, attempt.retries, attempt.stored_at, attempt.deadline
+    )
     if confirm_status == Status.FAIL:
         confirm_status = Status.AWAITING
 
     logging.info(
         f"[CONFIRM] 3️⃣ ⏱️ Confirm phase took {time.perf_counter() - confirm_start:.2f}s for ID {record['id']}"
     )
-    result = await _finalize(
-        record,
+    CONFIRM_TIMING.log_summary()
+    return await _finish(
+        attempt,
         confirm_status,
-        booking_code,
-        retries + (confirm_status == Status.FAIL),
-        chat_id,
-        bot,
+        attempt.booking_code,
+        attempt.retries + (confirm_status == Status.FAIL),
+        reason=FailureReason.CONFIRM,
+    )
+
+
+async def _finish(
+    attempt: ReservationAttempt,
+    status: str,
+    booking_code: str | None = None,
+    retries: int | None = None,
+    **kwargs,
+) -> ReservationAttempt:
+    record = attempt.record
+    attempt.result = await _finalize(
+        record,
+        status,
+        booking_code if booking_code is not None else record["booking_code"],
+        attempt.retries if retries is None else retries,
+        record.get("chat_id"),
+        **kwargs,
     )
-    process_end = time.perf_counter()
     logging.info(
-        f"[JOB] 🕒 Process for ID {record['id']} took {process_end - process_start:.2f}s"
+        f"[JOB] 🕒 Process for ID {record['id']} took {time.perf_counter() - attempt.started_at:.2f}s"
     )
-    return result
+    return attempt
 
 
 async def _reserve_phase(record: dict) -> tuple[int | None, int | None, int | None]:
@@ -153,55 +375,104 @@ async def _reserve_phase(record: dict) -> tuple[int | None, int | None, int | No
         return None, None, None
 
 
+async def _availability_phase(
+    record: dict, duration: int, deadline: float | None = None
+) -> bool:
+    """
+    Gate the attempt on the shared availability snapshot of the current boundary so
+    fully booked slots do not cost a captcha solve. Unknown availability lets it through.
+    """
+    seats = await free_seats(
+        current_boundary(UPSTREAM_CLOCK.now()),
+        record["selected_date"],
+        record["start_time"],
+        record["end_time"],
+        duration,
+        deadline=deadline,
+    )
+    if seats == 0:
+        logging.info(f"[GATE] ⏸️ No free seats — deferring ID {record['id']}")
+        return False
+    return True
+
+
 async def _set_phase(
-    record: dict, start: int, end: int, duration: int, user: dict, retries: int
-) -> tuple[str | None, str | None, str | None]:
+    record: dict,
+    start: int,
+    end: int,
+    duration: int,
+    user: dict,
+    retries: int,
+    recaptcha_token: str | None = None,
+    deadline: float | None = None,
+) -> tuple[str | None, str | None, str | None, FailureReason | None]:
     """
     Attempt to create the reservation entry.
-    Returns a tuple of (booking_code, entry, set_status) where:
+    Returns a tuple of (booking_code, entry, set_status, reason) where:
     - booking_code: user-facing code (may be None if request failed or not returned yet)
     - entry: code required for confirm_reservation (None on failure)
     - set_status: None on success so caller can proceed to confirm; otherwise a terminal status
       like "existing", "fail", or "terminated" to short-circuit the flow.
+    - reason: why the attempt failed, for scheduling the next one (None on success)
     """
+    return await _store_outcome(
+        record,
+        retries,
+        set_reservation(
+            start,
+            end,
+            duration,
+            user,
+            calculate_timeout(retries),
+            record=record,
+            recaptcha_token=recaptcha_token,
+            deadline=deadline,
+        ),
+    )
+
+
+async def _store_outcome(
+    record: dict, retries: int, request: Awaitable[dict]
+) -> tuple[str | None, str | None, str | None, FailureReason | None]:
     booking_code = record.get("booking_code")  # may be None
-    retry_limit = _set_retry_limit(record)
     entry = None
     try:
-        resp = await set_reservation(
-            start, end, duration, user, calculate_timeout(retries), record=record
-        )
+        resp = await request
         booking_code = resp.get("codice_prenotazione")
         entry = resp.get("entry")
         logging.info(f"[JOB_SET] 2️⃣ ✅ Reservation set for ID {record['id']}")
-        return booking_code, entry, None
+        return booking_code, entry, None, None
     except ReservationConfirmationConflict as e:
         logging.error(
             f"[JOB_SET] 2️⃣ ❌ Already confirmed during set for ID {record['id']}: {e}"
         )
-        return booking_code or "UNKNOWN", entry, Status.EXISTING
+        return booking_code or "UNKNOWN", entry, Status.EXISTING, None
     except TimeoutError as e:
         logging.warning(f"[JOB_SET] 2️⃣ ⚠️ Set timed out for ID {record['id']}: {e}")
-        return booking_code, entry, Status.FAIL
+        return booking_code, entry, Status.FAIL, FailureReason.TIMEOUT
     except Exception as e:
         logging.error(f"[JOB_SET] 2️⃣ ❌ Set failed for ID {record['id']}: {e}")
-        return (
-            booking_code,
-            entry,
-            (Status.TERMINATED if retries + 1 > retry_limit else Status.FAIL),
-        )
+        status = _failed_status(record, retries)
+        return booking_code, entry, status, classify_failure(e)
 
 
-async def _confirm_phase(record: dict, entry: str | None, retries: int) -> str:
+async def _confirm_phase(
+    record: dict,
+    entry: str | None,
+    retries: int,
+    stored_at: float | None = None,
+    deadline: float | None = None,
+) -> str:
     if not entry:
         logging.error(
             f"[JOB_CONFIRM] 3️⃣ ❌ No entry code available for confirm on ID {record['id']}"
         )
         return Status.FAIL
 
-    retry_limit = _set_retry_limit(record)
     try:
-        await confirm_reservation(entry=entry, record=record)
+        await confirm_reservation(
+            entry=entry, record=record, stored_at=stored_at, deadline=deadline
+        )
         logging.info(f"[JOB_CONFIRM] 3️⃣ ✅ Confirmed for ID {record['id']}")
         return Status.SUCCESS
     except ReservationConfirmationConflict:
@@ -209,12 +480,12 @@ async def _confirm_phase(record: dict, entry: str | None, retries: int) -> str:
             f"[JOB_CONFIRM] 3️⃣ ⚠️ Conflict (already confirmed) for ID {record['id']}"
         )
         return Status.EXISTING
-    except TimeoutError or ReadTimeout as e:
+    except (TimeoutError, ReadTimeout) as e:
         logging.warning(f"[JOB_CONFIRM] 3️⃣ ⚠️ Timed out for ID {record['id']}: {e}")
         return Status.FAIL
     except Exception as e:
         logging.error(f"[JOB_CONFIRM] 3️⃣ ❌ Failed for ID {record['id']}: {e}")
-        return Status.TERMINATED if retries + 1 > retry_limit else Status.FAIL
+        return _failed_status(record, retries)
 
 
 def _is_stale_fail(record: dict) -> bool:
@@ -236,12 +507,13 @@ async def _finalize(
     booking_code,
     retries,
     chat_id,
-    bot: Bot,
     processed_at: datetime | None = None,
     success_at: datetime | None = None,
     fail_at: datetime | None = None,
     terminated_at: datetime | None = None,
     canceled_at: datetime | None = None,
+    notify: bool = True,
+    reason: FailureReason | None = None,
 ) -> dict:
     old_status = record["status"]
     status_changed = status != old_status
@@ -267,14 +539,25 @@ async def _finalize(
         case Status.CANCELED:
             result["canceled_at"] = canceled_at or now_ts
 
-    if chat_id and _should_notify(old_status, status, retries):
-        notif = show_notification(status, record, booking_code)
-        try:
-            await bot.send_message(chat_id=chat_id, text=notif, parse_mode="Markdown")
-        except Exception as e:
-            logging.error(
-                f"[NOTIF] Failed to notify chat_id {chat_id} for ID {record['id']}: {e}"
-            )
+    if status != Status.PROCESSING:  # hand the row back
+        result["claimed_by"] = None
+        result["lease_expires_at"] = None
+
+    if status in (Status.PENDING, Status.FAIL, Status.AWAITING):
+        reason = reason or (
+            FailureReason.CONFIRM if status == Status.AWAITING else FailureReason.UNKNOWN
+        )
+        result["last_failure"] = reason
+        result["next_attempt_at"] = next_attempt_at(
+            reason, retries, _is_priority_user(record), now_ts
+        )
+
+    if notify and chat_id and _should_notify(old_status, status, retries):
+        # written with the status in one UPDATE; dispatch_notifications sends it
+        result["notification_text"] = show_notification(status, record, booking_code)
+        result["notified"] = False
+        result["notify_attempts"] = 0
+        result["notify_after"] = None
     return result
 
 
@@ -291,18 +574,106 @@ def _should_notify(old_status: str, new_status: str, retries: int) -> bool:
     return False
 
 
-async def throttled_process_reservation(record: dict, bot: Bot) -> dict:
-    async with semaphore:
-        return await process_reservation(record, bot)
+def _reservation_pipeline() -> Pipeline:
+    global _pipeline
+    if _pipeline is None:
+        concurrency = get_worker_concurrency()  # read once the env has been loaded
+        queue_size = concurrency * STAGE_QUEUE_FACTOR
+        _pipeline = Pipeline(
+            "reservations",
+            [
+                Stage(
+                    "captcha",
+                    partial(_run_stage, _captcha_stage),
+                    concurrency * CAPTCHA_WORKERS_FACTOR,
+                    queue_size,
+                ),
+                Stage(
+                    "store",
+                    partial(_run_stage, _store_stage),
+                    concurrency,
+                    queue_size,
+                ),
+                Stage(
+                    "confirm",
+                    partial(_run_stage, _confirm_stage),
+                    concurrency,
+                    queue_size,
+                ),
+            ],
+            on_error=_abandon_attempt,
+        )
+        _pipeline.start()
+    return _pipeline
+
+
+async def _run_stage(
+    stage: Callable[[ReservationAttempt], Awaitable[ReservationAttempt]],
+    attempt: ReservationAttempt,
+) -> ReservationAttempt | None:
+    attempt = await _within_deadline(stage, attempt)
+    if attempt.result is None:
+        return attempt  # hand over to the next stage
+    await _persist_results([attempt.result])
+    return None
+
+
+async def _abandon_attempt(attempt: ReservationAttempt, error: Exception) -> None:
+    """
+    Store an attempt whose stage raised as a failed one. If even that fails, stop
+    heartbeating its lease so the sweeper can reclaim the row once it expires.
+    """
+    record = attempt.record
+    try:
+        if attempt.result is None:
+            if attempt.entry:  # stored; the confirm is still owed
+                await _finish(attempt, Status.AWAITING, attempt.booking_code)
+            else:
+                await _finish(
+                    attempt,
+                    _failed_status(record, attempt.retries),
+                    retries=attempt.retries + 1,
+                    reason=FailureReason.UNKNOWN,
+                )
+        await _persist_results([attempt.result])
+    finally:
+        _leased.discard(record["id"])
+
+
+async def execute_reservations() -> None:
+    """
+    Claim as many rows as the captcha queue can take and hand them to the pipeline.
+    Stages keep running between ticks; a full pipeline simply claims nothing.
+    """
+    if _draining:
+        return
+    with _tracked_task():
+        await _claim_into_pipeline()
 
 
-async def execute_reservations(bot: Bot) -> None:
-    records: list[dict] = await claim_reservations(limit=SEMAPHORE_LIMIT * 2)
+async def _claim_into_pipeline() -> None:
+    await _await_upstream_boundary()
+    pipeline = _reservation_pipeline()
+    capacity = pipeline.capacity()
+    if capacity == 0:
+        logging.info("[DB-JOB] Pipeline is full — nothing claimed this tick")
+        pipeline.log_stats()
+        return
+    records: list[dict] = await claim_reservations(
+        limit=capacity, shard=get_worker_shard()
+    )
+    _leased.update(r["id"] for r in records)
     if not records:
         logging.info("[DB-JOB] No pending reservations to process")
         return
-    tasks = [throttled_process_reservation(record, bot) for record in records]
-    updates = await asyncio.gather(*tasks)
+    boundary_ts = current_boundary(UPSTREAM_CLOCK.now()).timestamp()
+    for record in records:
+        await pipeline.submit(ReservationAttempt.claimed(record, boundary_ts))
+    logging.info(f"[DB-JOB] Reservation job queued {len(records)} reservations")
+    pipeline.log_stats()
+
+
+async def _persist_results(updates: list[dict]) -> None:
     await asyncio.gather(
         *(
             update_record(
@@ -311,7 +682,226 @@ async def execute_reservations(bot: Bot) -> None:
             for r in updates
         )
     )  # Skip the first value since it is an ID
-    logging.info(f"[DB-JOB] Reservation job completed: {len(updates)} updated")
+    for r in updates:
+        _stored_attempts.pop(r["id"], None)
+    _leased.difference_update(r["id"] for r in updates)
+
+
+async def heartbeat_leases() -> None:
+    """Keep the leases of rows this worker is still working on from expiring."""
+    if not _leased:
+        return
+    ids = list(_leased)
+    try:
+        extended = await extend_leases(ids, get_worker_id(), LEASE_SECONDS)
+    except Exception as e:
+        logging.error(f"[LEASE] ❌ Heartbeat failed for {len(ids)} rows: {e}")
+        return
+    lost = [i for i in ids if i not in extended and i in _leased]
+    if lost:
+        logging.warning(f"[LEASE] ⚠️ Lost leases for {len(lost)} rows: {lost}")
+        _leased.difference_update(lost)  # finished or reclaimed elsewhere
+
+
+async def launch_boundary(
+    lead_seconds: float | None = None,
+    jitter_ms: float | None = None,
+) -> list[float]:
+    """
+    Pre-stage the reservations due at the next :00/:30 boundary and fire them together.
+    Claiming, payload building, cookie/captcha acquisition and the upstream handshake all
+    happen during the lead time; at the boundary only the `entry/store` POSTs remain.
+    Attempts still staging when the boundary passes fire on their own once ready.
+    Returns the fire-time offsets (ms after the boundary) of the attempts that were sent.
+    Lead and jitter default to LAUNCH_LEAD_SECONDS/LAUNCH_JITTER_MS from the env.
+    """
+    if _draining:
+        return []
+    default_lead, default_jitter = get_launch_timing()
+    with _tracked_task():
+        return await _launch(
+            default_lead if lead_seconds is None else lead_seconds,
+            default_jitter if jitter_ms is None else jitter_ms,
+        )
+
+
+async def _launch(lead_seconds: float, jitter_ms: float) -> list[float]:
+    log_clock_offset()
+    boundary = next_boundary(UPSTREAM_CLOCK.now())
+    boundary_ts = boundary.timestamp()
+    records: list[dict] = await claim_reservations(
+        limit=get_worker_concurrency() * LAUNCH_CLAIM_FACTOR, shard=get_worker_shard()
+    )
+    _leased.update(r["id"] for r in records)
+    if not records:
+        logging.info(f"[LAUNCH] No reservations to stage for {boundary:%H:%M}")
+        return []
+    logging.info(
+        f"[LAUNCH] Staging {len(records)} attempts for {boundary:%H:%M} "
+        f"({boundary_ts - UPSTREAM_CLOCK.time():.2f}s before boundary, lead {lead_seconds}s)"
+    )
+
+    cookie = await _launch_cookie(boundary_ts)
+    async with _launch_client() as client:
+        # each attempt fires as soon as both it and the boundary are ready, so a slow
+        # captcha solve only delays its own POST
+        warmup = asyncio.create_task(_warm_before(client, boundary_ts))
+        offsets = await asyncio.gather(
+            *(
+                _launch_attempt(record, client, boundary_ts, cookie, jitter_ms)
+                for record in records
+            )
+        )
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+
+    offsets = [offset for offset in offsets if offset is not None]
+    if offsets:
+        logging.info(
+            f"[LAUNCH] 🎯 Fired {len(offsets)}/{len(records)} attempts at {boundary:%H:%M} — offset ms "
+            f"min {min(offsets):.1f} / median {statistics.median(offsets):.1f} / max {max(offsets):.1f}"
+        )
+    else:
+        logging.info(f"[LAUNCH] No attempts fired at {boundary:%H:%M}")
+    return offsets
+
+
+@contextmanager
+def _tracked_task():
+    task = asyncio.current_task()
+    _claiming_tasks.add(task)
+    try:
+        yield
+    finally:
+        _claiming_tasks.discard(task)
+
+
+@asynccontextmanager
+async def _launch_client() -> AsyncIterator[httpx.AsyncClient]:
+    async with open_upstream_client() as client:
+        _upstream_clients.add(client)
+        try:
+            yield client
+        finally:
+            _upstream_clients.discard(client)
+
+
+async def _launch_cookie(boundary_ts: float) -> str | None:
+    """The session cookie, unless a stalled login would hold the launch too long."""
+    budget = boundary_ts - LAUNCH_COOKIE_MARGIN_SECONDS - UPSTREAM_CLOCK.time()
+    try:
+        return await asyncio.wait_for(get_cookie_header(), timeout=max(budget, 0))
+    except TimeoutError:
+        logging.warning(f"[LAUNCH] ⚠️ No cookie within {budget:.1f}s — staging without")
+        return None
+
+
+async def _warm_before(client: httpx.AsyncClient, boundary_ts: float) -> None:
+    """Open the upstream connection just before the boundary, while it is still fresh."""
+    await _sleep_until(boundary_ts - LAUNCH_WARMUP_SECONDS)
+    await warm_upstream(client)
+
+
+async def _launch_attempt(
+    record: dict,
+    client: httpx.AsyncClient,
+    boundary_ts: float,
+    cookie: str | None,
+    jitter_ms: float,
+) -> float | None:
+    """Stage one attempt, fire it and store its outcome; returns its fire offset."""
+    stage_start = time.perf_counter()
+    attempt = await _stage_attempt(record, boundary_ts, cookie)
+    if attempt.result is not None:
+        await _persist_results([attempt.result])
+        return None
+    early = boundary_ts - UPSTREAM_CLOCK.time()
+    logging.info(
+        f"[LAUNCH] Staged ID {record['id']} in {time.perf_counter() - stage_start:.2f}s "
+        + (f"({early:.2f}s before boundary)" if early > 0 else f"({-early:.2f}s late)")
+    )
+    result, offset_ms = await _fire_attempt(attempt, client, boundary_ts, jitter_ms)
+    await _persist_results([result])
+    return offset_ms
+
+
+async def _stage_attempt(
+    record: dict, boundary_ts: float, cookie: str | None
+) -> ReservationAttempt:
+    attempt = ReservationAttempt.claimed(record, boundary_ts)
+    attempt = await _within_deadline(
+        partial(_captcha_stage, gate=False), attempt
+    )  # seats open at boundary
+    if attempt.result is None:
+        attempt.payload = build_reservation_payload(
+            attempt.start, attempt.end, attempt.duration, attempt.user, attempt.token
+        )
+        attempt.headers = build_upstream_headers(cookie)
+    return attempt
+
+
+async def _fire_attempt(
+    attempt: ReservationAttempt,
+    client: httpx.AsyncClient,
+    boundary_ts: float,
+    jitter_ms: float,
+) -> tuple[dict, float]:
+    record = attempt.record
+    await _sleep_until(boundary_ts + random.uniform(0, jitter_ms) / 1000)
+    offset_ms = (UPSTREAM_CLOCK.time() - boundary_ts) * 1000
+    logging.info(f"[LAUNCH] 🚀 Fired ID {record['id']} at {offset_ms:+.1f}ms")
+
+    attempt = await _within_deadline(
+        partial(_staged_store_stage, client=client), attempt
+    )
+    if attempt.result is None:
+        attempt = await _within_deadline(_confirm_stage, attempt)
+    return attempt.result, offset_ms
+
+
+async def _staged_store_stage(
+    attempt: ReservationAttempt, client: httpx.AsyncClient
+) -> ReservationAttempt:
+    booking_code, entry, set_status, reason = await _store_outcome(
+        attempt.record, attempt.retries, _send_staged(attempt, client)
+    )
+    return await _stored(attempt, booking_code, entry, set_status, reason)
+
+
+async def _send_staged(attempt: ReservationAttempt, client: httpx.AsyncClient) -> dict:
+    try:
+        return await send_reservation(
+            client,
+            attempt.payload,
+            attempt.headers,
+            timeout=clamp_timeout(calculate_timeout(attempt.retries), attempt.deadline),
+        )
+    except ConnectionError as e:
+        if isinstance(e.__cause__, httpx.ConnectError):  # token never reached upstream
+            release_recaptcha_token(attempt.token, attempt.token_acquired_at)
+        raise
+
+
+async def _sleep_until(target_ts: float) -> None:
+    """Sleep until `target_ts` on the upstream clock."""
+    remaining = target_ts - UPSTREAM_CLOCK.time()
+    if remaining > LAUNCH_SPIN_SECONDS:
+        await asyncio.sleep(remaining - LAUNCH_SPIN_SECONDS)
+    while UPSTREAM_CLOCK.time() < target_ts:
+        await asyncio.sleep(0.001)
+
+
+async def _await_upstream_boundary() -> None:
+    """
+    Cron triggers fire on the local clock. When the upstream clock lags behind, a
+    boundary tick would claim rows before the seats actually open, so hold it back
+    until the upstream has reached the same boundary.
+    """
+    boundary = current_boundary(datetime.now(ZoneInfo("Europe/Rome")))
+    lag = boundary.timestamp() - UPSTREAM_CLOCK.time()
+    if lag > 0:
+        logging.info(f"[CLOCK] Upstream is {lag:.2f}s behind — delaying boundary tick")
+        await _sleep_until(boundary.timestamp())
 
 
 async def backup_reservations() -> None:
@@ -327,18 +917,25 @@ async def backup_reservations() -> None:
 
 
 async def execute_slot_snapshot() -> None:
-    all_slots = await get_available_slots("3600", filter_past=False)  # one-hour slots
+    global _last_slot_snapshot
+    snapshot = await AVAILABILITY_CACHE.snapshot(
+        3600, allow_stale=False
+    )  # one-hour slots
+    all_slots = snapshot.slots
 
     if not all_slots:
         logging.info("[DB-JOB] No slots to insert — snapshot skipped")
         return
+    if snapshot.fetched_at == _last_slot_snapshot:
+        logging.info("[DB-JOB] Snapshot already saved — skipped")
+        return
+    _last_slot_snapshot = snapshot.fetched_at
 
     await insert_slots(all_slots)
     logging.info("[DB-JOB] Snapshot saved!")
 
 
-def schedule_reserve_job(bot: Bot) -> None:
-    scheduler = AsyncIOScheduler(timezone="Europe/Rome")
+def schedule_reserve_job() -> None:
     start, end = JOB_SCHEDULE.get_hours("weekday")  # UTC hours
     trigger = CronTrigger(
         second="*/10",
@@ -346,7 +943,7 @@ def schedule_reserve_job(bot: Bot) -> None:
         hour=f"{start}-{end}",
         day_of_week="mon-fri",
     )
-    scheduler.add_job(execute_reservations, trigger, args=[bot])
+    SCHEDULER.add_job(execute_reservations, trigger)
 
     trigger = CronTrigger(
         second="*/20",
@@ -354,7 +951,7 @@ def schedule_reserve_job(bot: Bot) -> None:
         hour=start,
         day_of_week="mon-fri",
     )
-    scheduler.add_job(execute_reservations, trigger, args=[bot])
+    SCHEDULER.add_job(execute_reservations, trigger)
 
     start, end = JOB_SCHEDULE.get_hours("sat")
     trigger_sat = CronTrigger(
@@ -363,7 +960,7 @@ def schedule_reserve_job(bot: Bot) -> None:
         hour=f"{start}-{end}",
         day_of_week="sat",
     )
-    scheduler.add_job(execute_reservations, trigger_sat, args=[bot])
+    SCHEDULER.add_job(execute_reservations, trigger_sat)
 
     start, end = JOB_SCHEDULE.get_hours("sun")
     trigger_sun = CronTrigger(
@@ -372,14 +969,49 @@ def schedule_reserve_job(bot: Bot) -> None:
         hour=f"{start}-{end}",
         day_of_week="sun",
     )
-    scheduler.add_job(execute_reservations, trigger_sun, args=[bot])
+    SCHEDULER.add_job(execute_reservations, trigger_sun)
+
+    SCHEDULER.add_job(
+        heartbeat_leases, IntervalTrigger(seconds=LEASE_HEARTBEAT_SECONDS)
+    )
+    _hold_claim_shard()
+    SCHEDULER.start()
+
+
+def schedule_launcher_job(
+    lead_seconds: float | None = None,
+    jitter_ms: float | None = None,
+) -> None:
+    default_lead, default_jitter = get_launch_timing()  # env is loaded by now
+    lead_seconds = default_lead if lead_seconds is None else lead_seconds
+    jitter_ms = default_jitter if jitter_ms is None else jitter_ms
+    lead = int(lead_seconds)
+    minute, second = divmod(30 * 60 - lead, 60)
+    minutes = f"{minute},{minute + 30}"
+    kwargs = {"lead_seconds": lead_seconds, "jitter_ms": jitter_ms}
+
+    for key, day_of_week in (("weekday", "mon-fri"), ("sat", "sat"), ("sun", "sun")):
+        start, end = JOB_SCHEDULE.get_hours(key)
+        trigger = CronTrigger(
+            second=second,
+            minute=minutes,
+            hour=f"{start - 1}-{end}",
+            day_of_week=day_of_week,
+        )
+        SCHEDULER.add_job(launch_boundary, trigger, kwargs=kwargs)
 
-    scheduler.start()
+    _hold_claim_shard()
+    SCHEDULER.start()
 
 
-def schedule_slot_snapshot_job() -> None:
-    scheduler = AsyncIOScheduler(timezone="Europe/Rome")
+def _hold_claim_shard() -> None:
+    """Tell the other workers this shard's owner is alive, so they leave its rows."""
+    shard = get_worker_shard()
+    if shard is not None:
+        SCHEDULER.hold(shard_lock_name(shard[0]))
 
+
+def schedule_slot_snapshot_job() -> None:
     start, end = JOB_SCHEDULE.get_hours("availability")
     trigger = CronTrigger(
         second="*/10",
@@ -387,7 +1019,7 @@ def schedule_slot_snapshot_job() -> None:
         hour=f"{start}-{end}",
         day_of_week="mon-fri",
     )
-    scheduler.add_job(execute_slot_snapshot, trigger)
+    SCHEDULER.add_job(execute_slot_snapshot, trigger, singleton=True)
 
     trigger = CronTrigger(
         second="*/45",
@@ -395,7 +1027,7 @@ def schedule_slot_snapshot_job() -> None:
         hour=f"{start}-{end}",
         day_of_week="mon-fri",
     )
-    scheduler.add_job(execute_slot_snapshot, trigger)
+    SCHEDULER.add_job(execute_slot_snapshot, trigger, singleton=True)
 
     trigger = CronTrigger(
         second="*/25",
@@ -403,55 +1035,148 @@ def schedule_slot_snapshot_job() -> None:
         hour=f"{start}",
         day_of_week="mon-fri",
     )
-    scheduler.add_job(execute_slot_snapshot, trigger)
+    SCHEDULER.add_job(execute_slot_snapshot, trigger, singleton=True)
 
     start, end = JOB_SCHEDULE.get_hours("availability_sat")
     trigger_sat = CronTrigger(
         second="*/15", minute="0,1,2,30,31", hour=f"{start}-{end}", day_of_week="sat"
     )
-    scheduler.add_job(execute_slot_snapshot, trigger_sat)
+    SCHEDULER.add_job(execute_slot_snapshot, trigger_sat, singleton=True)
 
     trigger_sun = CronTrigger(
         second="*/15", minute="0,1,2,30,31", hour=f"{start}-{end}", day_of_week="sun"
     )
-    scheduler.add_job(execute_slot_snapshot, trigger_sun)
+    SCHEDULER.add_job(execute_slot_snapshot, trigger_sun, singleton=True)
 
-    scheduler.start()
+    SCHEDULER.start()
 
 
 def schedule_backup_job() -> None:
-    @aiocron.crontab("*/1 * * * *", tz=ZoneInfo("Europe/Rome"))
     async def _backup_job():
         logging.info("[GSHEET] Starting Google Sheets backup")
         await backup_reservations()
 
+    SCHEDULER.add_job(_backup_job, CronTrigger(minute="*/1"), singleton=True)
+    SCHEDULER.start()
+
 
 def schedule_reminder_job(bot: Bot) -> None:
-    @aiocron.crontab("30 23 * * 0-5", tz=ZoneInfo("Europe/Rome"))
     async def _reminder_job():
         logging.info("[NOTIF] Sending reminder notification")
         await notify_reminder(bot)
 
+    trigger = CronTrigger(minute=30, hour=23, day_of_week="mon-fri,sun")  # Sun - Fri
+    SCHEDULER.add_job(_reminder_job, trigger, singleton=True)
+    SCHEDULER.start()
+
 
 def schedule_activation_reminder_job(bot: Bot) -> None:
-    @aiocron.crontab("15,45 8-21 * * 0-5", tz=ZoneInfo("Europe/Rome"))  # Sun - Fri
     async def _reminder_activation_job():
         logging.info("[NOTIF] Sending slot activation reminder notification")
         await notify_reservation_activation(bot)
 
+    trigger = CronTrigger(
+        minute="15,45", hour="8-21", day_of_week="mon-fri,sun"
+    )  # Sun - Fri
+    SCHEDULER.add_job(_reminder_activation_job, trigger, singleton=True)
+    SCHEDULER.start()
+
 
 def schedule_donation_reminder_job(bot: Bot) -> None:
-    @aiocron.crontab("0 18 * * 1,3,5", tz=ZoneInfo("Europe/Rome"))  # Mon, Wed & Fri
     async def _reminder_donation_job():
         logging.info("[NOTIF] Sending donation reminder notification")
         await notify_donation(bot)
 
+    trigger = CronTrigger(minute=0, hour=18, day_of_week="mon,wed,fri")
+    SCHEDULER.add_job(_reminder_donation_job, trigger, singleton=True)
+    SCHEDULER.start()
+
+
+def schedule_notification_job(bot: Bot) -> None:
+    trigger = IntervalTrigger(seconds=NOTIFY_INTERVAL_SECONDS)
+    SCHEDULER.add_job(dispatch_notifications, trigger, args=[bot], singleton=True)
+    SCHEDULER.start()
+
 
 def schedule_sweeper_job() -> None:
-    @aiocron.crontab("*/5 * * * *", tz=ZoneInfo("Europe/Rome"))
     async def _sweeper():
         await sweep_stuck_reservations()
 
+    trigger = IntervalTrigger(minutes=1)  # leases expire in seconds
+    SCHEDULER.add_job(_sweeper, trigger, singleton=True)
+    SCHEDULER.start()
+
+
+async def drain_jobs(timeout: float = DRAIN_SECONDS) -> None:
+    """
+    Stop claiming, give in-flight attempts up to `timeout` seconds to finish, then
+    cancel whatever is left and hand its rows back in a single statement. Cleanup runs
+    even if the drain itself is interrupted.
+    """
+    global _draining
+    _draining = True
+    try:
+        await SCHEDULER.shutdown()  # also hands singleton jobs to another instance
+        logging.info(
+            f"[SHUTDOWN] Draining {len(_leased)} in-flight reservations (up to {timeout}s)"
+        )
+        async with asyncio.timeout(timeout):
+            await asyncio.gather(*_claiming_tasks, return_exceptions=True)
+            if _pipeline is not None:
+                await _pipeline.join()
+    except TimeoutError:
+        logging.warning(f"[SHUTDOWN] ⚠️ {len(_leased)} reservations still in flight")
+    finally:
+        await _stop_reservation_work()
+
+
+async def _stop_reservation_work() -> None:
+    tasks = list(_claiming_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if _pipeline is not None:
+        await _pipeline.close()
+    for client in list(_upstream_clients):  # normally closed as the launcher unwinds
+        await client.aclose()
+    await SCHEDULER.shutdown()  # no-op unless the drain was interrupted before it
+
+    try:
+        await _settle_stored_attempts()
+    except Exception as e:
+        logging.error(f"[SHUTDOWN] ❌ Storing entries awaiting confirm failed: {e}")
+    try:
+        released = await release_claims(get_worker_id())
+    except Exception as e:
+        logging.error(f"[SHUTDOWN] ❌ Releasing claims failed, leases will expire: {e}")
+        return
+    finally:
+        _leased.clear()
+    logging.info(
+        f"[SHUTDOWN] Drain finished — {len(released)} unfinished claims released"
+    )
+
+
+async def _settle_stored_attempts() -> None:
+    """
+    Store the cancelled attempts that already hold an entry as AWAITING with their
+    booking code, so releasing the claims does not send them back to be booked again.
+    """
+    attempts = [a for i, a in _stored_attempts.items() if i in _leased]
+    _stored_attempts.clear()
+    if not attempts:
+        return
+    for attempt in attempts:
+        if attempt.result is None:  # cancelled before the confirm finished
+            await _finish(
+                attempt,
+                Status.AWAITING,
+                attempt.booking_code,
+                reason=FailureReason.CONFIRM,
+            )
+    await _persist_results([a.result for a in attempts])
+    logging.info(f"[SHUTDOWN] {len(attempts)} stored entries left awaiting confirm")
+
 
 def start_jobs(bot: Bot) -> None:  #! except reservation
     schedule_backup_job()
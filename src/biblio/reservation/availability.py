@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from src.biblio.reservation.reservation import get_available_slots, time_left
+from src.biblio.reservation.slot_datetime import drop_past_slots
+
+AVAILABILITY_TTL = 15  # seconds a snapshot is served as fresh
+AVAILABILITY_STALE_TTL = 300  # seconds a snapshot may be served while revalidating
+GATE_SNAPSHOT_MAX_AGE = 10  # seconds; one snapshot per tick of the boundary job
+GATE_DEADLINE = 3.0  # seconds the gate may wait for a snapshot before letting through
+HEDGE_PERCENTILE = 0.9
+HEDGE_MIN_SAMPLES = 5
+HEDGE_DEFAULT_DELAY = 5.0  # seconds, until enough latencies have been observed
+HEDGE_MIN_DELAY = 0.5
+
+
+class SlotsSource:
+    CACHE = "cache"  # fresh cache hit
+    STALE = "stale"  # expired entry served while revalidating or on deadline
+    UPSTREAM = "upstream"  # single upstream fetch
+    HEDGED = "hedged"  # answered by the backup of a hedged fetch
+
+
+@dataclass(frozen=True)
+class SlotsResult:
+    slots: dict[str, int]
+    fetched_at: float
+    source: str
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 50):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class AvailabilityCache:
+    """
+    Process-wide cache of today's upstream schedule, keyed by (date, duration).
+
+    Concurrent misses for one key share a single upstream fetch (single-flight). Entries
+    older than `ttl` but younger than `stale_ttl` are served immediately while a
+    background refresh runs (stale-while-revalidate). Snapshots are stored unfiltered;
+    callers drop past slots at read time.
+
+    Fetches are hedged: when the upstream has not answered by the learned latency
+    percentile, a second request is raced against the first.
+    """
+
+    def __init__(
+        self,
+        ttl: float = AVAILABILITY_TTL,
+        stale_ttl: float = AVAILABILITY_STALE_TTL,
+        hedge: bool = True,
+    ):
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._hedge = hedge
+        self._latency = LatencyTracker()
+        self._entries: dict[tuple[date, int], SlotsResult] = {}
+        self._inflight: dict[tuple[date, int], asyncio.Task] = {}
+
+    async def get(
+        self,
+        duration: int,
+        max_age: float | None = None,
+        allow_stale: bool = True,
+        deadline: float | None = None,
+    ) -> dict[str, int]:
+        result = await self.snapshot(duration, max_age, allow_stale, deadline)
+        return result.slots
+
+    async def snapshot(
+        self,
+        duration: int,
+        max_age: float | None = None,
+        allow_stale: bool = True,
+        deadline: float | None = None,
+    ) -> SlotsResult:
+        """
+        Return today's slots for `duration` seconds. With `deadline` (seconds), a
+        refresh that takes longer falls back to the last snapshot of the day, whatever
+        its age; the refresh keeps running and fills the cache for later callers.
+        """
+        key = (datetime.now(ZoneInfo("Europe/Rome")).date(), int(duration))
+        max_age = self._ttl if max_age is None else max_age
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.age <= max_age:
+                return replace(entry, source=SlotsSource.CACHE)
+            if allow_stale and entry.age <= self._stale_ttl:
+                self._refresh(key)
+                return self._served(key, replace(entry, source=SlotsSource.STALE))
+
+        refresh = asyncio.shield(self._refresh(key))
+        if deadline is None:
+            return self._served(key, await refresh)
+        try:
+            async with asyncio.timeout(deadline):
+                return self._served(key, await refresh)
+        except TimeoutError:
+            entry = self._entries.get(key)
+            if entry is None:
+                logging.warning(f"[AVAILABILITY] Deadline of {deadline}s hit for {key}")
+                raise
+            return self._served(key, replace(entry, source=SlotsSource.STALE))
+
+    def _served(self, key: tuple[date, int], result: SlotsResult) -> SlotsResult:
+        logging.info(
+            f"[AVAILABILITY] {key} served from {result.source} ({result.age:.1f}s old)"
+        )
+        return result
+
+    def _refresh(self, key: tuple[date, int]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key))
+            task.add_done_callback(_consume_error)  # background refreshes may fail
+            self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key: tuple[date, int]) -> SlotsResult:
+        _, duration = key
+        try:
+            slots, source = await self._fetch_upstream(duration)
+            result = SlotsResult(dict(slots) if slots else {}, time.time(), source)
+            self._entries = {
+                k: v for k, v in self._entries.items() if k[0] == key[0]
+            }  # drop previous days
+            self._entries[key] = result
+            return result
+        except Exception as e:
+            logging.warning(f"[AVAILABILITY] Refresh failed for {key}: {e}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _fetch_upstream(self, duration: int) -> tuple[dict, str]:
+        start = time.perf_counter()
+        primary = asyncio.create_task(self._timed_fetch(duration, start))
+        if not self._hedge:
+            return await primary, SlotsSource.UPSTREAM
+
+        delay = self._latency.percentile(HEDGE_PERCENTILE) or HEDGE_DEFAULT_DELAY
+        done, _ = await asyncio.wait({primary}, timeout=max(delay, HEDGE_MIN_DELAY))
+        if done:
+            return primary.result(), SlotsSource.UPSTREAM
+
+        logging.info(f"[AVAILABILITY] No answer after {delay:.1f}s — hedging fetch")
+        backup = asyncio.create_task(self._timed_fetch(duration, time.perf_counter()))
+        pending = {primary, backup}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        source = (
+                            SlotsSource.HEDGED if task is backup else SlotsSource.UPSTREAM
+                        )
+                        return task.result(), source
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _timed_fetch(self, duration: int, start: float) -> dict:
+        try:
+            slots = await get_available_slots(str(duration), filter_past=False)
+        except asyncio.CancelledError:
+            self._latency.record(time.perf_counter() - start)  # a lower bound
+            raise
+        self._latency.record(time.perf_counter() - start)
+        return slots
+
+
+def _consume_error(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+AVAILABILITY_CACHE = AvailabilityCache()
+
+
+async def get_cached_slots(
+    duration: int,
+    filter_past: bool = True,
+    allow_stale: bool = True,
+    deadline: float | None = None,
+) -> SlotsResult:
+    result = await AVAILABILITY_CACHE.snapshot(
+        duration, allow_stale=allow_stale, deadline=deadline
+    )
+    if filter_past:
+        result = replace(result, slots=drop_past_slots(result.slots))
+    return result
+
+
+async def free_seats(
+    boundary: datetime,
+    selected_date,
+    start_time,
+    end_time,
+    duration: int,
+    deadline: float | None = None,
+) -> int | None:
+    """
+    Free seats for the slot starting at `start_time` with `duration` seconds, or None
+    when the snapshot cannot answer (other day, unknown slot, upstream failure, no
+    answer within GATE_DEADLINE or before the epoch `deadline`).
+    Only snapshots taken after `boundary` count, so every boundary gets fresh data.
+    """
+    if selected_date != boundary.date():
+        return None  # the schedule endpoint only serves today
+    max_age = min(GATE_SNAPSHOT_MAX_AGE, max(time.time() - boundary.timestamp(), 0))
+    try:
+        wait = min(GATE_DEADLINE, time_left(deadline) or GATE_DEADLINE)
+        # not the cache's own deadline: its stale fallback predates the boundary
+        async with asyncio.timeout(wait):
+            slots = await AVAILABILITY_CACHE.get(
+                duration, max_age=max_age, allow_stale=False
+            )
+    except Exception as e:
+        logging.warning(f"[GATE] Availability snapshot unavailable: {e!r}")
+        return None
+    key = f"{start_time.strftime('%H:%M')}-{end_time.strftime('%H:%M')}"
+    return slots.get(key) if slots else None
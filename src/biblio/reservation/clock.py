@@ -0,0 +1,99 @@
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from zoneinfo import ZoneInfo
+
+import httpx
+
+CLOCK_SAMPLE_LIMIT = 64
+CLOCK_SAMPLE_MAX_AGE = 30 * 60  # seconds; older samples stop constraining drift
+DATE_HEADER_RESOLUTION = 1.0  # HTTP dates are truncated to whole seconds
+
+
+class UpstreamClock:
+    """
+    Estimates `server_time - local_time` for the prenotabiblio upstream.
+
+    Every response carries a `Date` header D stamped somewhere between the moment the
+    request was sent and the moment the response arrived. The offset therefore lies in
+    [D - received_at, D + 1 - sent_at]; intersecting the intervals of recent responses
+    narrows that window. The estimate is its midpoint and the uncertainty its half-width.
+    """
+
+    def __init__(
+        self,
+        sample_limit: int = CLOCK_SAMPLE_LIMIT,
+        max_age: float = CLOCK_SAMPLE_MAX_AGE,
+    ):
+        self._samples: deque[tuple[float, float, float]] = deque(maxlen=sample_limit)
+        self._max_age = max_age
+
+    def observe(self, date_header: str | None, sent_at: float, received_at: float) -> None:
+        if not date_header:
+            return
+        try:
+            server_ts = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            logging.warning(f"[CLOCK] Unparseable Date header: {date_header!r}")
+            return
+        lower = server_ts - received_at
+        upper = server_ts + DATE_HEADER_RESOLUTION - sent_at
+        self._samples.append((lower, upper, received_at))
+
+    def offset(self) -> tuple[float, float]:
+        """Return (offset, uncertainty) in seconds; uncertainty is inf without samples."""
+        bounds = self._bounds()
+        if bounds is None:
+            return 0.0, math.inf
+        lower, upper = bounds
+        return (lower + upper) / 2, (upper - lower) / 2
+
+    def time(self) -> float:
+        return time.time() + self.offset()[0]
+
+    def now(self, tz: ZoneInfo = ZoneInfo("Europe/Rome")) -> datetime:
+        return datetime.fromtimestamp(self.time(), tz)
+
+    def _bounds(self) -> tuple[float, float] | None:
+        cutoff = time.time() - self._max_age
+        while self._samples and self._samples[0][2] < cutoff:
+            self._samples.popleft()
+        if not self._samples:
+            return None
+
+        # Walk back from the newest sample; stop once an older one contradicts the rest
+        # (clock step or drift) so stale evidence cannot empty the window.
+        lower, upper = -math.inf, math.inf
+        for sample_lower, sample_upper, _ in reversed(self._samples):
+            new_lower, new_upper = max(lower, sample_lower), min(upper, sample_upper)
+            if new_lower > new_upper:
+                break
+            lower, upper = new_lower, new_upper
+        return lower, upper
+
+
+UPSTREAM_CLOCK = UpstreamClock()
+
+
+def log_clock_offset() -> None:
+    offset, uncertainty = UPSTREAM_CLOCK.offset()
+    if math.isinf(uncertainty):
+        logging.info("[CLOCK] No upstream clock samples yet — using local time")
+        return
+    logging.info(f"[CLOCK] Upstream offset {offset:+.3f}s ± {uncertainty:.3f}s")
+
+
+async def _mark_sent(request: httpx.Request) -> None:
+    request.extensions["sent_at"] = time.time()
+
+
+async def _observe_response(response: httpx.Response) -> None:
+    sent_at = response.request.extensions.get("sent_at")
+    if sent_at is not None:
+        UPSTREAM_CLOCK.observe(response.headers.get("Date"), sent_at, time.time())
+
+
+CLOCK_EVENT_HOOKS = {"request": [_mark_sent], "response": [_observe_response]}
@@ -0,0 +1,128 @@
+import logging
+import math
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+
+CONFIRM_SAMPLE_LIMIT = 200
+CONFIRM_MIN_SAMPLES = 10
+CONFIRM_MAX_ATTEMPTS = 3
+CONFIRM_QUANTILES = (0.5, 0.9, 0.99)
+CONFIRM_DEFAULT_SCHEDULE = (1.0, 3.0, 6.0)  # fixed 1s sleep, then 2s/3s backoff
+CONFIRM_MIN_GAP = 0.1  # seconds between two tries of the same entry
+CONFIRM_TAIL_FACTOR = 1.5
+CONFIRM_FIT_ITERATIONS = 50
+
+
+class ConfirmTiming:
+    """
+    Learns how long after a successful `entry/store` the confirm endpoint stops
+    answering 404 for the new entry.
+
+    The delay is never seen directly, only bounded: a confirm that succeeds at t
+    seconds after the store, following a 404 at t0, puts it in (t0, t]; a success on
+    the first try in (0, t]; an entry still 404 at its last try t0 in (t0, inf).
+    The distribution is fitted to these intervals (Turnbull's estimator), so wide
+    first-try windows do not drag the estimate towards their midpoint.
+    Confirms are then scheduled at the learned p50 and retried at the upper quantiles,
+    so most entries are confirmed close to the moment they become confirmable.
+    """
+
+    def __init__(self, sample_limit: int = CONFIRM_SAMPLE_LIMIT):
+        self._bounds: deque[tuple[float, float]] = deque(maxlen=sample_limit)
+        self._fit: list[tuple[float, float]] | None = None  # (delay, cumulative share)
+        self.tries = 0
+        self.not_found = 0
+
+    def observe_not_found(self) -> None:
+        self.tries += 1
+        self.not_found += 1
+
+    def observe_ready(self, last_not_found: float, confirmed_at: float) -> None:
+        self.tries += 1
+        self._observe(last_not_found, confirmed_at)
+
+    def observe_unconfirmed(self, last_not_found: float) -> None:
+        """The entry was still not found at its last try."""
+        self._observe(last_not_found, math.inf)
+
+    def _observe(self, lower: float, upper: float) -> None:
+        self._bounds.append((lower, max(upper, lower + 1e-3)))
+        self._fit = None
+
+    def quantile(self, q: float) -> float | None:
+        if len(self._bounds) < CONFIRM_MIN_SAMPLES:
+            return None
+        if self._fit is None:
+            self._fit = _fit_intervals(list(self._bounds))
+        previous, reached = 0.0, 0.0
+        for delay, share in self._fit:
+            if share >= q - 1e-9:
+                if math.isinf(delay):  # beyond every confirmed entry
+                    return previous or max(lower for lower, _ in self._bounds)
+                if share <= reached:
+                    return delay
+                # spread each point's mass evenly back to the previous point
+                return previous + (delay - previous) * (q - reached) / (share - reached)
+            previous, reached = delay, share
+        return previous
+
+    def schedule(self, attempts: int = CONFIRM_MAX_ATTEMPTS) -> list[float]:
+        """Offsets in seconds after the store at which to try the confirm."""
+        if self.quantile(0.5) is None:
+            offsets = list(CONFIRM_DEFAULT_SCHEDULE)
+        else:
+            offsets = [self.quantile(q) for q in CONFIRM_QUANTILES]
+
+        schedule: list[float] = []
+        for offset in offsets:
+            floor = schedule[-1] + CONFIRM_MIN_GAP if schedule else 0.0
+            schedule.append(max(offset, floor))
+        while len(schedule) < attempts:
+            schedule.append(schedule[-1] * CONFIRM_TAIL_FACTOR + CONFIRM_MIN_GAP)
+        return schedule[:attempts]
+
+    def not_found_rate(self) -> float | None:
+        return self.not_found / self.tries if self.tries else None
+
+    def log_summary(self) -> None:
+        p50 = self.quantile(0.5)
+        if p50 is None:
+            logging.info(
+                f"[CONFIRM] ⏱️ Learning readiness delay ({len(self._bounds)} samples)"
+            )
+            return
+        logging.info(
+            f"[CONFIRM] ⏱️ Ready after p50 {p50:.2f}s / p90 {self.quantile(0.9):.2f}s, "
+            f"404 rate {self.not_found_rate():.0%} over {self.tries} tries"
+        )
+
+
+def _fit_intervals(bounds: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """
+    Self-consistency (EM) fit of a delay distribution to interval-censored
+    observations (lower, upper]. Mass sits on the distinct upper bounds; returns
+    (delay, cumulative share) pairs in increasing order.
+    """
+    points = sorted({upper for _, upper in bounds})
+    spans = [
+        (bisect_right(points, lower), bisect_right(points, upper))
+        for lower, upper in bounds
+    ]  # indices of the points inside each interval, contiguous
+    mass = [1 / len(points)] * len(points)
+    for _ in range(CONFIRM_FIT_ITERATIONS):
+        cumulative = [0.0, *accumulate(mass)]
+        weights = [0.0] * (len(points) + 1)
+        for first, last in spans:
+            total = cumulative[last] - cumulative[first]
+            if total > 0:
+                weights[first] += 1 / total
+                weights[last] -= 1 / total
+        mass = [
+            share * weight / len(bounds)
+            for share, weight in zip(mass, accumulate(weights[:-1]))
+        ]
+    return list(zip(points, accumulate(mass)))
+
+
+CONFIRM_TIMING = ConfirmTiming()
@@ -2,20 +2,36 @@ import asyncio
 import logging
 import os
 import time
+from collections import deque
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 import httpx
-from playwright.async_api import async_playwright
 
 from src.biblio.config.config import ReservationConfirmationConflict
+from src.biblio.reservation.clock import CLOCK_EVENT_HOOKS
+from src.biblio.reservation.confirm_timing import CONFIRM_MAX_ATTEMPTS, CONFIRM_TIMING
 from src.biblio.reservation.slot_datetime import extract_available_seats
 from src.biblio.utils.validation import validate_user_data
 
+UPSTREAM_BASE_URL = "https://prenotabiblio.sba.unimi.it/portalePlanningAPI/"
+RESERVATION_URL = f"{UPSTREAM_BASE_URL}api/entry/store"
+UPSTREAM_HEADERS = {
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9,de;q=0.8,fa;q=0.7",
+    "Origin": "https://prenotabiblio.sba.unimi.it",
+    "Referer": "https://prenotabiblio.sba.unimi.it/portalePlanning/biblio/prenota/Riepilogo",
+    "X-App-Locale": "it",
+    "X-Cliente": "2",
+}
+DEFAULT_CLIENT_TIMEOUT = httpx.Timeout(5.0)  # httpx's own default
+WARMUP_TIMEOUT = 10.0
 CAPTCHA_ITERATION = 24
 CAPTCHA_SLEEP = 5
+CAPTCHA_TOKEN_TTL = 100  # reCAPTCHA tokens expire after ~120s
 COOKIE_CACHE_TTL = 300
 _COOKIE_CACHE: tuple[str, float] | None = None
+_CAPTCHA_POOL: deque[tuple[str, float]] = deque()
 
 
 def calculate_timeout(
@@ -25,25 +41,36 @@ def calculate_timeout(
     return httpx.Timeout(connect=10.0, read=min(read, max_read), write=10.0, pool=10.0)
 
 
-async def set_reservation(
+def time_left(deadline: float | None) -> float | None:
+    """Seconds until the epoch `deadline`; raises TimeoutError once it has passed."""
+    if deadline is None:
+        return None
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise TimeoutError("Attempt deadline passed")
+    return remaining
+
+
+def clamp_timeout(timeout: httpx.Timeout, deadline: float | None) -> httpx.Timeout:
+    remaining = time_left(deadline)
+    if remaining is None:
+        return timeout
+    return httpx.Timeout(
+        connect=min(timeout.connect or remaining, remaining),
+        read=min(timeout.read or remaining, remaining),
+        write=min(timeout.write or remaining, remaining),
+        pool=min(timeout.pool or remaining, remaining),
+    )
+
+
+def build_reservation_payload(
     start_time: int,
     end_time: int,
     duration: int,
     user_data: dict,
-    timeout: httpx.Timeout | None = None,
-    record: dict | None = None,
-    cookie: str | None = None,
+    recaptcha_token: str,
 ) -> dict:
-    url = "https://prenotabiblio.sba.unimi.it/portalePlanningAPI/api/entry/store"
-
-    try:
-        validate_user_data(user_data)
-    except ValueError as e:
-        logging.error(f"[SET] User data validation failed: {e}")
-        raise
-
-    recaptcha_token = await _solve_recaptcha(record)
-    payload = {
+    return {
         "reservation_number": 0,
         "backoffice": {},
         "cliente": "biblio",
@@ -64,90 +91,157 @@ async def set_reservation(
         "timezone": "Europe/Rome",
     }
 
-    headers = {
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "en-US,en;q=0.9,de;q=0.8,fa;q=0.7",
-        "Origin": "https://prenotabiblio.sba.unimi.it",
-        "Referer": "https://prenotabiblio.sba.unimi.it/portalePlanning/biblio/prenota/Riepilogo",
-        "X-App-Locale": "it",
-        "X-Cliente": "2",
-    }
-    cookie_value = await _resolve_cookie_header(cookie, user_data=user_data)
+
+def build_upstream_headers(cookie_value: str | None = None) -> dict:
+    headers = dict(UPSTREAM_HEADERS)
     if cookie_value:
         headers["Cookie"] = cookie_value
+    return headers
 
-    async with httpx.AsyncClient(timeout=timeout, verify=False) as client:
-        try:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            response_data = response.json()
-            if "entry" in response_data:  # entry = NOT Booking Code!
-                logging.info(
-                    f"[SET] Reservation successful. Booking Code: {response_data['codice_prenotazione']}"
-                )
-                return response_data
-            else:
-                logging.error(
-                    '[SET] Unexpected response format: "Booking Code" not found.'
-                )
-                raise ValueError(
-                    '[SET] Unexpected response format: "Booking Code" not found.'
-                )
 
-        except httpx.ReadTimeout as e:
-            logging.error(f"[SET] Timeout: Server took too long to respond – {repr(e)}")
-            raise TimeoutError("Reservation request timed out") from e
+def open_upstream_client(
+    timeout: httpx.Timeout | None = DEFAULT_CLIENT_TIMEOUT,
+) -> httpx.AsyncClient:
+    # Every upstream response feeds the clock-offset estimate via its Date header.
+    return httpx.AsyncClient(
+        timeout=timeout, verify=False, event_hooks=CLOCK_EVENT_HOOKS
+    )
 
-        except httpx.RequestError as e:
-            logging.error(f"[SET] Request failed: {type(e).__name__} - {repr(e)}")
-            raise ConnectionError("Network error during reservation") from e
-        except ValueError as e:
-            logging.error(f"[SET] Value error: {type(e).__name__} - {e}")
-            raise
 
-        except Exception as e:
-            logging.exception(f"[SET] Unexpected error: {type(e).__name__} - {repr(e)}")
-            raise
+async def warm_upstream(client: httpx.AsyncClient) -> None:
+    """
+    Open the TCP/TLS connection to the upstream ahead of time so the first real
+    request on `client` does not pay the handshake. The response itself is ignored.
+    """
+    start = time.perf_counter()
+    try:
+        await client.head(UPSTREAM_BASE_URL, timeout=WARMUP_TIMEOUT)
+        logging.info(
+            f"[WARMUP] Upstream connection ready in {time.perf_counter() - start:.2f}s"
+        )
+    except httpx.HTTPError as e:
+        logging.warning(f"[WARMUP] Upstream warm-up failed: {type(e).__name__} - {e}")
+
+
+async def set_reservation(
+    start_time: int,
+    end_time: int,
+    duration: int,
+    user_data: dict,
+    timeout: httpx.Timeout | None = None,
+    record: dict | None = None,
+    cookie: str | None = None,
+    recaptcha_token: str | None = None,
+    deadline: float | None = None,
+) -> dict:
+    try:
+        validate_user_data(user_data)
+    except ValueError as e:
+        logging.error(f"[SET] User data validation failed: {e}")
+        raise
+
+    if recaptcha_token is None:
+        recaptcha_token = await acquire_recaptcha_token(record, deadline=deadline)
+    payload = build_reservation_payload(
+        start_time, end_time, duration, user_data, recaptcha_token
+    )
+    cookie_value = await _resolve_cookie_header(cookie, user_data=user_data)
+    headers = build_upstream_headers(cookie_value)
+
+    timeout = clamp_timeout(timeout or DEFAULT_CLIENT_TIMEOUT, deadline)
+    async with open_upstream_client(timeout) as client:
+        return await send_reservation(client, payload, headers)
+
+
+async def send_reservation(
+    client: httpx.AsyncClient,
+    payload: dict,
+    headers: dict,
+    timeout: httpx.Timeout | None = None,
+) -> dict:
+    kwargs = {"timeout": timeout} if timeout is not None else {}
+    try:
+        response = await client.post(
+            RESERVATION_URL, json=payload, headers=headers, **kwargs
+        )
+        response.raise_for_status()
+        response_data = response.json()
+        if "entry" in response_data:  # entry = NOT Booking Code!
+            logging.info(
+                f"[SET] Reservation successful. Booking Code: {response_data['codice_prenotazione']}"
+            )
+            return response_data
+        else:
+            logging.error('[SET] Unexpected response format: "Booking Code" not found.')
+            raise ValueError(
+                '[SET] Unexpected response format: "Booking Code" not found.'
+            )
+
+    except httpx.ReadTimeout as e:
+        logging.error(f"[SET] Timeout: Server took too long to respond – {repr(e)}")
+        raise TimeoutError("Reservation request timed out") from e
+
+    except httpx.RequestError as e:
+        logging.error(f"[SET] Request failed: {type(e).__name__} - {repr(e)}")
+        raise ConnectionError("Network error during reservation") from e
+    except ValueError as e:
+        logging.error(f"[SET] Value error: {type(e).__name__} - {e}")
+        raise
+
+    except Exception as e:
+        logging.exception(f"[SET] Unexpected error: {type(e).__name__} - {repr(e)}")
+        raise
 
 
 async def confirm_reservation(
     entry: str,
-    max_retries: int = 3,
+    max_retries: int = CONFIRM_MAX_ATTEMPTS,
     record: dict | None = None,
     cookie: str | None = None,
+    stored_at: float | None = None,
+    deadline: float | None = None,
 ) -> dict:
+    """
+    Confirm a stored entry. Tries are spread over the learned readiness schedule,
+    measured from `stored_at` (a `time.perf_counter()` reading taken when `entry/store`
+    answered); without it the store is assumed to have just completed. No try is
+    started past the epoch `deadline`.
+    """
     url = f"https://prenotabiblio.sba.unimi.it/portalePlanningAPI/api/entry/confirm/{entry}"
     message = f" for ID {record['id']}" if record else ""
+    stored_at = time.perf_counter() if stored_at is None else stored_at
 
-    headers = {
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "en-US,en;q=0.9,de;q=0.8,fa;q=0.7",
-        "Origin": "https://prenotabiblio.sba.unimi.it",
-        "Referer": "https://prenotabiblio.sba.unimi.it/portalePlanning/biblio/prenota/Riepilogo",
-        "X-App-Locale": "it",
-        "X-Cliente": "2",
-    }
     cookie_value = await _resolve_cookie_header(cookie, user_data=None)
-    if cookie_value:
-        headers["Cookie"] = cookie_value
-
-    async with httpx.AsyncClient(verify=False) as client:
-        for attempt in range(max_retries):
-            timeout = calculate_timeout(retries=attempt, base=5, step=5, max_read=60)
+    headers = build_upstream_headers(cookie_value)
+
+    last_not_found = 0.0
+    schedule = CONFIRM_TIMING.schedule(max_retries)
+    async with open_upstream_client() as client:
+        for attempt, offset in enumerate(schedule):
+            delay = stored_at + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            timeout = clamp_timeout(
+                calculate_timeout(retries=attempt, base=5, step=5, max_read=60), deadline
+            )
             try:
                 response = await client.post(url, timeout=timeout, headers=headers)
                 response.raise_for_status()
+                CONFIRM_TIMING.observe_ready(
+                    last_not_found, time.perf_counter() - stored_at
+                )
                 logging.info(f"[CONFIRM] Success{message} on attempt {attempt + 1}")
                 return response.json()
 
             except httpx.HTTPStatusError as e:
                 status = e.response.status_code
                 if status == 404:
+                    last_not_found = time.perf_counter() - stored_at
+                    CONFIRM_TIMING.observe_not_found()
                     logging.warning(
-                        f"[CONFIRM] 404 Not Found{message} — Attempt {attempt + 1}/{max_retries}"
+                        f"[CONFIRM] 404 Not Found{message} after {last_not_found:.2f}s — Attempt {attempt + 1}/{max_retries}"
                     )
-                    await asyncio.sleep(2 + attempt * 1)  # backoff
-                    continue
+                    continue  # next try follows the schedule
                 elif status == 400:
                     logging.error(
                         f"[CONFIRM] 400 Bad Request{message} — Invalid booking_code or payload."
@@ -168,8 +262,7 @@ async def confirm_reservation(
                 logging.warning(
                     f"[CONFIRM] Timeout on attemptz{message} {attempt + 1} – {repr(e)}"
                 )
-                await asyncio.sleep(1 + attempt * 0.5)
-                continue  # retry after timeout
+                continue  # retry at the next scheduled offset
 
             except httpx.RequestError as e:
                 logging.error(
@@ -182,12 +275,16 @@ async def confirm_reservation(
                 )
                 raise
 
+        if last_not_found:
+            CONFIRM_TIMING.observe_unconfirmed(last_not_found)
         raise RuntimeError(
             f"[CONFIRM] Gave up after max retries{message} — booking code not found."
         )
 
 
-async def _solve_recaptcha(record: dict | None = None) -> str:
+async def _solve_recaptcha(
+    record: dict | None = None, deadline: float | None = None
+) -> str:
     api_key = os.getenv("CAPTCHA_API_KEY")
     site_key = os.getenv("CAPTCHA_SITE_KEY")
     page_url = os.getenv("CAPTCHA_PAGE_URL")
@@ -198,7 +295,9 @@ async def _solve_recaptcha(record: dict | None = None) -> str:
         )
         raise ValueError("Captcha configuration missing!")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with httpx.AsyncClient(
+        timeout=clamp_timeout(httpx.Timeout(30.0), deadline)
+    ) as client:
         start = time.perf_counter()
         logging.info(f"[CAPTCHA] 🧩 Submitting solve task{message}.")
         submit_resp = await client.post(
@@ -226,7 +325,8 @@ async def _solve_recaptcha(record: dict | None = None) -> str:
         logging.info(f"[CAPTCHA] 🧩 Task created{message}: {captcha_id}")
 
         for _ in range(CAPTCHA_ITERATION):
-            await asyncio.sleep(CAPTCHA_SLEEP)
+            remaining = time_left(deadline)
+            await asyncio.sleep(min(CAPTCHA_SLEEP, remaining or CAPTCHA_SLEEP))
             result_resp = await client.post(
                 "https://api.2captcha.com/getTaskResult",
                 json={
@@ -261,6 +361,34 @@ async def _solve_recaptcha(record: dict | None = None) -> str:
     raise TimeoutError("Captcha solve timed out")
 
 
+async def acquire_recaptcha_token(
+    record: dict | None = None, deadline: float | None = None
+) -> str:
+    token = _pop_pooled_token()
+    if token:
+        message = f" for ID {record['id']}" if record and record.get("id") else ""
+        logging.info(f"[CAPTCHA] ♻️ Using pooled token{message}.")
+        return token
+    return await _solve_recaptcha(record, deadline=deadline)
+
+
+def release_recaptcha_token(token: str, solved_at: float | None = None) -> None:
+    """Return an unused token to the pool so another attempt can spend it."""
+    _CAPTCHA_POOL.append((token, solved_at or time.time()))
+
+
+def _pop_pooled_token() -> str | None:
+    while _CAPTCHA_POOL:
+        token, ts = _CAPTCHA_POOL.popleft()
+        if time.time() - ts <= CAPTCHA_TOKEN_TTL:
+            return token
+    return None
+
+
+async def get_cookie_header(user_data: dict | None = None) -> str | None:
+    return await _resolve_cookie_header(None, user_data=user_data)
+
+
 async def _resolve_cookie_header(
     cookie: str | None, user_data: dict | None
 ) -> str | None:
@@ -297,24 +425,32 @@ async def _fetch_cookie_header(user_data: dict | None) -> str | None:
         "https://prenotabiblio.sba.unimi.it/portalePlanning/biblio/prenota/dati",
         "https://prenotabiblio.sba.unimi.it/portalePlanning/biblio/prenota/Riepilogo",
     ]
+    from playwright.async_api import async_playwright  # cookie refreshes only
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-        for url in urls:
-            await page.goto(url, wait_until="networkidle")
-            if url.endswith("/prenota/dati") and user_data:
-                await page.fill(
-                    'input[name="codice_fiscale"]', user_data["codice_fiscale"]
-                )
-                await page.fill('input[name="cognome_nome"]', user_data["cognome_nome"])
-                await page.fill('input[name="email"]', user_data["email"])
-                try:
-                    await page.get_by_role("button", name="Avanti").click(timeout=1500)
-                except Exception:
-                    pass
-        cookies = await context.cookies()
-        await browser.close()
+        try:  # also on cancellation, e.g. when the jobs process drains
+            context = await browser.new_context()
+            page = await context.new_page()
+            for url in urls:
+                await page.goto(url, wait_until="networkidle")
+                if url.endswith("/prenota/dati") and user_data:
+                    await page.fill(
+                        'input[name="codice_fiscale"]', user_data["codice_fiscale"]
+                    )
+                    await page.fill(
+                        'input[name="cognome_nome"]', user_data["cognome_nome"]
+                    )
+                    await page.fill('input[name="email"]', user_data["email"])
+                    try:
+                        await page.get_by_role("button", name="Avanti").click(
+                            timeout=1500
+                        )
+                    except Exception:
+                        pass
+            cookies = await context.cookies()
+        finally:
+            await browser.close()
     if not cookies:
         return None
     return "; ".join(f"{c['name']}={c['value']}" for c in cookies)
@@ -326,7 +462,7 @@ async def cancel_reservation(
     url = f"https://prenotabiblio.sba.unimi.it/portalePlanningAPI/api/entry/{mode}/{booking_code}?chiave={codice}"
 
     payload = {"type": "libera_posto"} if mode == "update" else None
-    async with httpx.AsyncClient(verify=False) as client:
+    async with open_upstream_client() as client:
         try:
             response = await client.post(url, json=payload)
             response.raise_for_status()
@@ -379,7 +515,7 @@ async def get_available_slots(
     url = f"https://prenotabiblio.sba.unimi.it/portalePlanningAPI/api/entry/50/schedule/{today}/25/{hour}"
 
     start_time = time.perf_counter()
-    async with httpx.AsyncClient(verify=False) as client:
+    async with open_upstream_client() as client:
         for attempt in range(max_retries):
             timeout = calculate_timeout(retries=attempt, base=40, step=20, max_read=100)
 
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import httpx
+
+from src.biblio.config.config import FailureReason
+from src.biblio.reservation.slot_datetime import next_boundary
+
+# Base delay in seconds before the next attempt: (regular, priority)
+RETRY_DELAYS = {
+    FailureReason.CAPTCHA: (30, 10),
+    FailureReason.TIMEOUT: (20, 10),
+    FailureReason.UPSTREAM: (60, 20),
+    FailureReason.REJECTED: (120, 60),
+    FailureReason.INVALID: (900, 600),
+    FailureReason.CONFIRM: (5, 2),
+    FailureReason.DEADLINE: (30, 10),
+    FailureReason.UNKNOWN: (60, 20),
+}
+RETRY_BACKOFF = 2
+RETRY_BACKOFF_CAP = 4  # doublings
+RETRY_MAX_DELAY = 15 * 60
+
+
+def classify_failure(error: BaseException) -> FailureReason:
+    if isinstance(error, TimeoutError):
+        return FailureReason.TIMEOUT
+    if isinstance(error, ConnectionError):
+        return FailureReason.UPSTREAM
+    if isinstance(error, httpx.HTTPStatusError):
+        if error.response.status_code >= 500:
+            return FailureReason.UPSTREAM
+        return FailureReason.REJECTED
+    if isinstance(error, ValueError):
+        return FailureReason.INVALID
+    return FailureReason.UNKNOWN
+
+
+def next_attempt_at(
+    reason: FailureReason,
+    retries: int,
+    is_priority_user: bool = False,
+    now: datetime | None = None,
+) -> datetime:
+    """
+    Earliest time the row may be claimed again. "No seats" waits for the next :00/:30
+    boundary, when seats are released; everything else backs off exponentially from a
+    per-reason base delay, shorter for priority users.
+    """
+    now = now or datetime.now(ZoneInfo("Europe/Rome"))
+    if reason == FailureReason.NO_SEATS:
+        return next_boundary(now)
+
+    regular, priority = RETRY_DELAYS.get(reason, RETRY_DELAYS[FailureReason.UNKNOWN])
+    base = priority if is_priority_user else regular
+    exponent = min(max(retries - 1, 0), RETRY_BACKOFF_CAP)
+    delay = min(base * RETRY_BACKOFF**exponent, RETRY_MAX_DELAY)
+    return now + timedelta(seconds=delay)
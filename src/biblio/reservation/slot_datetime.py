@@ -18,6 +18,16 @@ def round_time_to_nearest_half_hour(time_obj: datetime) -> datetime:
     return time_obj
 
 
+def current_boundary(now: datetime) -> datetime:
+    """Return the latest :00/:30 slot opening at or before `now`."""
+    return now.replace(minute=(0 if now.minute < 30 else 30), second=0, microsecond=0)
+
+
+def next_boundary(now: datetime) -> datetime:
+    """Return the first :00/:30 slot opening strictly after `now`."""
+    return current_boundary(now) + timedelta(minutes=30)
+
+
 def reserve_datetime(date: str, start: str, duration: int) -> tuple[int, int, int]:
     """
     Converts user-provided date, start time, and duration into Unix timestamps.
@@ -77,16 +87,21 @@ def reserve_datetime(date: str, start: str, duration: int) -> tuple[int, int, in
 
 
 def extract_available_seats(schedule: dict[str, dict], filter_past: bool = True) -> dict[str, int]:
+    result = {slot: info['disponibili'] for slot, info in schedule.items()}
+    return drop_past_slots(result) if filter_past else result
+
+
+def drop_past_slots(slots: dict[str, int]) -> dict[str, int]:
     now = datetime.now(ZoneInfo('Europe/Rome'))
     now_minutes = 0 if now.minute < 30 else 30
     now_rounded = time(now.hour, now_minutes)
 
     result = {}
-    for slot, info in schedule.items():
+    for slot, available in slots.items():
         start_time, _ = slot.split('-')
         start_time = datetime.strptime(start_time, '%H:%M').time()
 
-        if not filter_past or start_time >= now_rounded:
-            result[slot] = info['disponibili']
+        if start_time >= now_rounded:
+            result[slot] = available
 
     return result
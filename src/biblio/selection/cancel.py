@@ -11,19 +11,37 @@ from src.biblio.db.fetch import fetch_reservation_by_id
 from src.biblio.db.update import update_cancel_status
 from src.biblio.reservation.reservation import cancel_reservation
 from src.biblio.utils.keyboards import Keyboard, Label
+from src.biblio.utils.user_data import discard, unstash
+
+
+async def _cancelation_choices(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> dict | None:
+    """The choices listed when the cancelation started; None once evicted or restarted."""
+    choices = unstash(context.user_data, UserDataKey.CANCELATION_CHOICES)
+    if choices is None:
+        await update.message.reply_text(
+            "⌛ That list has expired. Please pick *Cancel Reservation* again.",
+            parse_mode="Markdown",
+            reply_markup=Keyboard.reservation_type(context.user_data[UserDataKey.IS_ADMIN]),
+        )
+    return choices
 
 
 async def cancelation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_input = update.message.text.strip()
 
     if user_input == Label.RESERVATION_TYPE_BACK:
+        discard(context.user_data, UserDataKey.CANCELATION_CHOICES)
         await update.message.reply_text(
             "You are so determined, wow!",
             reply_markup=Keyboard.reservation_type(context.user_data[UserDataKey.IS_ADMIN]),
         )
         return State.RESERVE_TYPE
 
-    choices: dict = context.user_data[UserDataKey.CANCELATION_CHOICES]
+    choices = await _cancelation_choices(update, context)
+    if choices is None:
+        return State.RESERVE_TYPE
     cancelation_id = next(
         (id for id, deatils in choices.items() if deatils["button"] == user_input), None
     )
@@ -64,7 +82,9 @@ async def cancelation_confirmation(
     user_input = update.message.text.strip()
 
     if user_input == Label.CONFIRM_NO:
-        choices: dict = context.user_data[UserDataKey.CANCELATION_CHOICES]
+        choices = await _cancelation_choices(update, context)
+        if choices is None:
+            return State.RESERVE_TYPE
         reservation_buttons = [choice["button"] for choice in choices.values()]
         await update.message.reply_text(
             "God kill me now! 😭",
@@ -74,6 +94,7 @@ async def cancelation_confirmation(
 
     elif user_input == Label.CANCEL_CONFIRM_YES:
         reservation_id: str = context.user_data[UserDataKey.CANCELATION_CHOSEN_SLOT_ID]
+        discard(context.user_data, UserDataKey.CANCELATION_CHOICES)
         history = await fetch_reservation_by_id(reservation_id)
         failure = False
         if history:
@@ -7,8 +7,8 @@ from telegram.ext import ContextTypes
 
 from src.biblio.bot.messages import show_existing_reservations
 from src.biblio.config.config import Schedule, State, UserDataKey
-from src.biblio.db.fetch import fetch_slot_history
 from src.biblio.utils import utils
+from src.biblio.utils.history import SLOT_HISTORY_CACHE
 from src.biblio.utils.keyboards import Keyboard, Label
 
 LIB_SCHEDULE = Schedule.weekly()
@@ -124,8 +124,8 @@ async def date_history(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
     context.user_data[UserDataKey.SELECTED_DATE_HISTORY] = user_input
 
-    history = await fetch_slot_history(
-        date=datetime.strptime(
+    history = await SLOT_HISTORY_CACHE.get(
+        datetime.strptime(
             context.user_data[UserDataKey.SELECTED_DATE_HISTORY], "%A, %Y-%m-%d"
         )
     )
@@ -134,7 +134,6 @@ async def date_history(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         await update.message.reply_text("🚫 No data! Choose again from the list.")
         return State.CHOOSING_DATE_HISTORY
 
-    context.user_data[UserDataKey.SLOT_HISTORY] = history
     logging.info(
         f"🔄 fetched history for {update.effective_user} at {datetime.now(ZoneInfo('Europe/Rome'))}"
     )
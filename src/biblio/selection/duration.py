@@ -7,10 +7,12 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.biblio.config.config import State, UserDataKey
-from src.biblio.reservation.reservation import get_available_slots
+from src.biblio.reservation.availability import SlotsSource, get_cached_slots
 from src.biblio.utils.keyboards import Keyboard, Label
 from src.biblio.utils.validation import duration_overlap
 
+AVAILABILITY_DEADLINE = 8  # seconds before falling back to the last snapshot
+
 
 async def duration_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_input = update.message.text.strip()
@@ -132,7 +134,8 @@ async def duration_availability(
     )
 
     try:
-        slots = await get_available_slots(hour=str(hour))
+        result = await get_cached_slots(hour, deadline=AVAILABILITY_DEADLINE)
+        slots = result.slots
     except Exception:
         logging.error("[GET] Failed to fetch available slots")
         await update.message.reply_text(
@@ -158,6 +161,10 @@ async def duration_availability(
 
         formatted = "```\n" + "\n".join(message_lines) + "\n```"
 
+    if result.source == SlotsSource.STALE:
+        fetched = datetime.fromtimestamp(result.fetched_at, ZoneInfo("Europe/Rome"))
+        formatted += f"\n_⚠️ Showing data from {fetched:%H:%M:%S}, fresh data is on its way._"
+
     await update.message.reply_text(
         textwrap.dedent(f"*Free Slots:*\n{formatted}"),
         parse_mode="Markdown",
@@ -0,0 +1,26 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from src.biblio.bot.messages import show_past_reservations
+from src.biblio.config.config import State, UserDataKey
+from src.biblio.utils.keyboards import Keyboard, Label
+
+
+async def past_reservations(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    user_input = update.message.text.strip()
+
+    if user_input == Label.HOME:
+        context.user_data.pop(UserDataKey.PAST_RESERVATIONS_CURSOR, None)
+        keyboard = Keyboard.reservation_type(context.user_data[UserDataKey.IS_ADMIN])
+        await update.message.reply_text("Back to the present. 🕰️", reply_markup=keyboard)
+        return State.RESERVE_TYPE
+
+    if user_input != Label.OLDER_RESERVATIONS:
+        await update.message.reply_text("Just pick an option form the list! 😒")
+        return State.PAST_RESERVATIONS
+
+    text, has_more = await show_past_reservations(update, context)
+    await update.message.reply_text(
+        text, parse_mode="Markdown", reply_markup=Keyboard.past_reservations(has_more)
+    )
+    return State.PAST_RESERVATIONS
@@ -3,7 +3,6 @@ import textwrap
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from pandas import DataFrame
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -15,6 +14,7 @@ from src.biblio.bot.messages import (
 )
 from src.biblio.config.config import Schedule, State, Status, UserDataKey
 from src.biblio.utils.keyboards import Keyboard, Label
+from src.biblio.utils.user_data import stash
 
 LIB_SCHEDULE = Schedule.weekly()
 
@@ -88,31 +88,31 @@ async def retry(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         choices = {}
         buttons = []
 
-        if not isinstance(reservations, DataFrame):
+        if not isinstance(reservations, list):
             await update.message.reply_text(
                 "_You have no reservations at the moment._", parse_mode="Markdown"
             )
             return State.RETRY
 
-        for _, row in reservations.iterrows():
-            if row["status"] in (Status.TERMINATED, Status.CANCELED):
+        for row in reservations:
+            if row.status in (Status.TERMINATED, Status.CANCELED):
                 continue
             try:
-                status = Status(row["status"]).emoji
+                status = Status(row.status).emoji
             except ValueError:
                 status = ""
-            start_time_str = row["start_time"].strftime("%H:%M")
-            end_time_str = row["end_time"].strftime("%H:%M")
-            selected_date = row["selected_date"].strftime("%A, %Y-%m-%d")
+            start_time_str = row.start_time.strftime("%H:%M")
+            end_time_str = row.end_time.strftime("%H:%M")
+            selected_date = row.selected_date.strftime("%A, %Y-%m-%d")
             button = f"{status} {selected_date} at {start_time_str} - {end_time_str}"
 
-            choices[f"{row['id']}"] = {
+            choices[f"{row.id}"] = {
                 "selected_date": selected_date,
                 "start_time": start_time_str,
                 "end_time": end_time_str,
-                "selected_duration": row["selected_duration"],
-                "booking_code": row["booking_code"],
-                "status": row["status"],
+                "selected_duration": row.selected_duration,
+                "booking_code": row.booking_code,
+                "status": row.status,
                 "button": button,
             }
             buttons.append(button)
@@ -123,7 +123,7 @@ async def retry(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             )
             return State.RETRY
 
-        context.user_data[UserDataKey.CANCELATION_CHOICES] = choices
+        stash(context.user_data, UserDataKey.CANCELATION_CHOICES, choices)
         keyboard = Keyboard.cancelation_options(buttons)
 
         logging.info(
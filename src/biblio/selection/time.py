@@ -8,6 +8,8 @@ from telegram.ext import ContextTypes
 
 from src.biblio.bot.messages import show_existing_reservations, show_slot_history
 from src.biblio.config.config import Schedule, State, UserDataKey
+from src.biblio.utils.charts import SLOT_CHARTS
+from src.biblio.utils.history import SLOT_HISTORY_CACHE, is_final_day
 from src.biblio.utils.keyboards import Keyboard, Label
 from src.biblio.utils.utils import utc_tuple_to_rome_time
 from src.biblio.utils.validation import normalize_slot_input, time_not_overlap
@@ -19,6 +21,14 @@ MIN_AVAILABILITY_START = utc_tuple_to_rome_time(hour_minute=(JOB_START, 0))
 MAX_AVAILABILITY_END = utc_tuple_to_rome_time(hour_minute=(JOB_END, 59))
 
 
+async def _slot_history(context: ContextTypes.DEFAULT_TYPE):
+    return await SLOT_HISTORY_CACHE.get(
+        datetime.strptime(
+            context.user_data[UserDataKey.SELECTED_DATE_HISTORY], "%A, %Y-%m-%d"
+        )
+    )
+
+
 # TODO: add check for time selection
 async def time_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_input = update.message.text.strip()
@@ -133,7 +143,7 @@ async def slot_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
         return State.CHOOSING_DATE_HISTORY
 
-    keyboard = Keyboard.slot(context.user_data[UserDataKey.SLOT_HISTORY])
+    keyboard = Keyboard.slot(await _slot_history(context))
     buttons = [button.text for row in keyboard.keyboard for button in row][
         :-1
     ]  # excluding the back button
@@ -174,7 +184,7 @@ async def filter_start_selection(
     user_input = update.message.text.strip()
 
     if user_input == Label.BACK:
-        keyboard = Keyboard.slot(context.user_data[UserDataKey.SLOT_HISTORY])
+        keyboard = Keyboard.slot(await _slot_history(context))
         await update.message.reply_text("Just choose a slot. 😒", reply_markup=keyboard)
         return State.CHOOSING_SLOT
 
@@ -287,14 +297,24 @@ async def filter_end_selection(
         parse_mode="Markdown",
     )
 
-    history_graph = await show_slot_history(
-        update=update,
-        history=context.user_data[UserDataKey.SLOT_HISTORY],
-        date=context.user_data[UserDataKey.SELECTED_DATE_HISTORY],
-        slot=context.user_data[UserDataKey.SLOT],
-        start=context.user_data[UserDataKey.FILTER_START],
-        end=context.user_data[UserDataKey.FILTER_END],
+    date = context.user_data[UserDataKey.SELECTED_DATE_HISTORY]
+    chart_key = (
+        date,
+        context.user_data[UserDataKey.SLOT],
+        context.user_data[UserDataKey.FILTER_START],
+        context.user_data[UserDataKey.FILTER_END],
     )
+    cacheable = is_final_day(datetime.strptime(date, "%A, %Y-%m-%d").date())
+    history_graph = SLOT_CHARTS.get(chart_key) if cacheable else None
+    if history_graph is None:
+        history_graph = await show_slot_history(
+            update=update,
+            history=await _slot_history(context),
+            date=date,
+            slot=chart_key[1],
+            start=chart_key[2],
+            end=chart_key[3],
+        )
     if history_graph is None:
         keyboard = Keyboard.filter(start_state=False)
         await update.message.reply_text(
@@ -303,8 +323,12 @@ async def filter_end_selection(
         )
         return State.CHOOSING_FILTER_END
 
-    await update.message.reply_photo(
+    if cacheable:
+        SLOT_CHARTS.put(chart_key, history_graph)
+    sent = await update.message.reply_photo(
         photo=history_graph, reply_markup=Keyboard.filter(start_state=True)
     )
+    if cacheable and sent.photo:
+        SLOT_CHARTS.put(chart_key, sent.photo[-1].file_id)
     await update.message.reply_text("🆕 Pick the starting time again.")
     return State.CHOOSING_FILTER_START
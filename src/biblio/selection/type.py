@@ -3,7 +3,6 @@ import textwrap
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from pandas import DataFrame
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -12,11 +11,13 @@ from src.biblio.bot.messages import (
     show_donate_message,
     show_existing_reservations,
     show_help,
+    show_past_reservations,
     show_support_message,
     show_user_agreement,
 )
 from src.biblio.config.config import Schedule, State, Status, UserDataKey
 from src.biblio.utils.keyboards import Keyboard, Label
+from src.biblio.utils.user_data import stash
 
 LIB_SCHEDULE = Schedule.weekly()
 
@@ -103,6 +104,16 @@ async def type_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text(text, parse_mode="Markdown")
         return State.RESERVE_TYPE
 
+    elif user_input == Label.PAST_RESERVATIONS:
+        context.user_data.pop(UserDataKey.PAST_RESERVATIONS_CURSOR, None)
+        text, has_more = await show_past_reservations(update, context)
+        await update.message.reply_text(
+            text,
+            parse_mode="Markdown",
+            reply_markup=Keyboard.past_reservations(has_more),
+        )
+        return State.PAST_RESERVATIONS
+
     elif user_input == Label.CANCEL_RESERVATION:
         reservations = await show_existing_reservations(
             update, context, cancel_stage=True
@@ -110,31 +121,31 @@ async def type_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         choices = {}
         buttons = []
 
-        if not isinstance(reservations, DataFrame):
+        if not isinstance(reservations, list):
             await update.message.reply_text(
                 "_You have no reservations at the moment._", parse_mode="Markdown"
             )
             return State.RESERVE_TYPE
 
-        for _, row in reservations.iterrows():
-            if row["status"] in (Status.TERMINATED, Status.CANCELED):
+        for row in reservations:
+            if row.status in (Status.TERMINATED, Status.CANCELED):
                 continue
             try:
-                status = Status(row["status"]).emoji
+                status = Status(row.status).emoji
             except ValueError:
                 status = ""
-            start_time_str = row["start_time"].strftime("%H:%M")
-            end_time_str = row["end_time"].strftime("%H:%M")
-            selected_date = row["selected_date"].strftime("%A %Y-%m-%d")
+            start_time_str = row.start_time.strftime("%H:%M")
+            end_time_str = row.end_time.strftime("%H:%M")
+            selected_date = row.selected_date.strftime("%A %Y-%m-%d")
             button = f"{status} {selected_date} at {start_time_str} - {end_time_str}"
 
-            choices[f"{row['id']}"] = {
+            choices[f"{row.id}"] = {
                 "selected_date": selected_date,
                 "start_time": start_time_str,
                 "end_time": end_time_str,
-                "selected_duration": row["selected_duration"],
-                "booking_code": row["booking_code"],
-                "status": row["status"],
+                "selected_duration": row.selected_duration,
+                "booking_code": row.booking_code,
+                "status": row.status,
                 "button": button,
             }
             buttons.append(button)
@@ -145,7 +156,7 @@ async def type_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
             return State.RESERVE_TYPE
 
-        context.user_data[UserDataKey.CANCELATION_CHOICES] = choices
+        stash(context.user_data, UserDataKey.CANCELATION_CHOICES, choices)
 
         logging.info(
             f"🔄 {update.effective_user} started cancelation at {datetime.now(ZoneInfo('Europe/Rome'))}"
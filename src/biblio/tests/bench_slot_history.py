@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from src.biblio.utils.utils import select_slot_window
+
+SLOTS = [f"{h:02d}:00-{h + 1:02d}:00" for h in range(8, 23)]
+SNAPSHOT_EVERY = timedelta(minutes=1)
+DAY_START, DAY_END = (6, 0), (22, 0)  # UTC, the availability job's window
+ROUNDS = 20
+
+
+def full_day(day: datetime) -> pd.DataFrame:
+    """One snapshot per slot every minute, shaped like `fetch_slot_history`."""
+    utc = ZoneInfo("UTC")
+    start = day.replace(hour=DAY_START[0], minute=DAY_START[1], tzinfo=utc)
+    end = day.replace(hour=DAY_END[0], minute=DAY_END[1], tzinfo=utc)
+    stamps = pd.date_range(start, end, freq=SNAPSHOT_EVERY).to_pydatetime()
+    rows = [
+        (stamp, slot, (i + j) % 120)
+        for j, slot in enumerate(SLOTS)
+        for i, stamp in enumerate(stamps)
+    ]
+    return pd.DataFrame(rows, columns=["job_timestamp", "slot", "available"])
+
+
+def legacy_window(history: pd.DataFrame, slot: str, start: dtime, end: dtime):
+    """The string round-trip `show_slot_history` and `plot_slot_history` used."""
+    all_slots = history.copy()
+    all_slots.rename(columns={"job_timestamp": "time"}, inplace=True)
+    all_slots["time"] = all_slots["time"].apply(
+        lambda t: t.replace(tzinfo=ZoneInfo("UTC"))
+        .astimezone(ZoneInfo("Europe/Rome"))
+        .strftime("%H:%M:%S")
+    )
+    all_slots = all_slots[
+        all_slots["time"].apply(
+            lambda t: start <= datetime.strptime(t, "%H:%M:%S").time() < end
+        )
+    ]
+    selected = all_slots[all_slots["slot"] == slot][["time", "available"]]
+    selected["time"] = pd.to_datetime(selected["time"], format="%H:%M:%S")
+    return selected
+
+
+def best_of(func, *args) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_slot_window_speedup():
+    history = full_day(datetime(2026, 3, 10))
+    args = (history, "10:00-11:00", dtime(8, 0), dtime(11, 0))
+
+    legacy, vectorized = legacy_window(*args), select_slot_window(*args)
+    assert list(legacy["available"]) == list(vectorized["available"])
+    assert list(legacy["time"].dt.time) == list(vectorized["time"].dt.time)
+
+    legacy_s = best_of(legacy_window, *args)
+    vectorized_s = best_of(select_slot_window, *args)
+    print(f"\n Slot window over {len(history)} snapshots (best of {ROUNDS})\n")
+    print(f"legacy     → {legacy_s * 1000:.1f} ms")
+    speedup = legacy_s / vectorized_s
+    print(f"vectorized → {vectorized_s * 1000:.1f} ms (×{speedup:.0f})")
+
+
+if __name__ == "__main__":
+    test_slot_window_speedup()
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import multiprocessing
+import socket
+import time
+import zlib
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import uvicorn
+
+from src.biblio.config.config import Status
+
+STORE_LATENCY = 0.2  # seconds the mock entry/store takes
+CONFIRM_READY_AFTER = 0.1  # seconds after store until confirm stops answering 404
+CAPTCHA_LATENCY = 0.5
+RECORDS_PER_WORKER = 120
+
+
+async def mock_upstream(scope, receive, send):
+    """Bare ASGI app mimicking entry/store and entry/confirm of prenotabiblio."""
+    if scope["type"] != "http":
+        return
+    path = scope["path"]
+    status, body = 200, b"{}"
+    if path.endswith("/entry/store"):
+        await asyncio.sleep(STORE_LATENCY)
+        entry = f"{time.time():.6f}"
+        body = (
+            f'{{"entry": "{entry}", "codice_prenotazione": "B{entry[-6:]}"}}'.encode()
+        )
+    elif "/entry/confirm/" in path:
+        stored_at = float(path.rsplit("/", 1)[-1])
+        if time.time() - stored_at < CONFIRM_READY_AFTER:
+            status, body = 404, b"{}"
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def serve_upstream(port: int) -> None:
+    uvicorn.run(mock_upstream, host="127.0.0.1", port=port, log_level="warning")
+
+
+class LocalUpstream(httpx.AsyncBaseTransport):
+    """Routes upstream requests to the mock; one shared pool, so no per-client TLS setup."""
+
+    def __init__(self, port: int):
+        self._port = port
+        self._inner = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(
+            scheme="http", host="127.0.0.1", port=self._port
+        )
+        return await self._inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass  # shared by every client of the worker
+
+
+def make_record(i: int) -> dict:
+    return {
+        "id": f"id-{i}",
+        "user_id": f"user-{i // 3}",  # a few reservations per user
+        "status": Status.PENDING,
+        "retries": 0,
+        "selected_date": datetime.now().date() + timedelta(days=1),
+        "start_time": dtime(hour=20, minute=30),
+        "end_time": dtime(hour=21, minute=30),
+        "selected_duration": 1,
+        "codice_fiscale": "RSSMRA80A01H501U",
+        "name": "Test User",
+        "email": "test@example.com",
+        "booking_code": "",
+        "chat_id": None,
+        "priority": 5,
+    }
+
+
+def shard_records(records: list[dict], index: int, count: int) -> list[dict]:
+    """Split up front in Python; the SQL shard predicate of the claim never runs."""
+    return [r for r in records if zlib.crc32(r["user_id"].encode()) % count == index]
+
+
+async def run_worker(records: list[dict], port: int) -> int:
+    from src.biblio import jobs
+    from src.biblio.reservation import reservation
+
+    pending = list(records)
+    transport = LocalUpstream(port)
+
+    async def claim(limit: int = 10, **kwargs) -> list[dict]:
+        # in-memory: no lease stamping and no SKIP LOCKED contention between workers
+        batch, pending[:] = pending[:limit], pending[limit:]
+        return batch
+
+    async def token(record=None, deadline=None) -> str:
+        await asyncio.sleep(CAPTCHA_LATENCY)
+        return "token"
+
+    def client(timeout=reservation.DEFAULT_CLIENT_TIMEOUT):
+        return httpx.AsyncClient(
+            timeout=timeout,
+            transport=transport,
+            event_hooks=reservation.CLOCK_EVENT_HOOKS,
+        )
+
+    with (
+        patch.object(jobs, "claim_reservations", claim),
+        patch.object(jobs, "update_record", AsyncMock()),
+        patch.object(jobs, "free_seats", AsyncMock(return_value=None)),
+        patch.object(jobs, "acquire_recaptcha_token", token),
+        patch.object(
+            reservation, "_resolve_cookie_header", AsyncMock(return_value="c")
+        ),
+        patch.object(reservation, "open_upstream_client", client),
+    ):
+        while pending or jobs._leased:
+            await jobs.execute_reservations()
+            await asyncio.sleep(0.05)
+        await jobs._pipeline.close()
+    return len(records)
+
+
+def worker_main(records: list[dict], port: int, ready, go, results) -> None:
+    logging.disable(logging.INFO)
+    from src.biblio import jobs  # noqa: F401 — import outside the measured window
+
+    ready.put(True)
+    go.wait()
+    results.put(asyncio.run(run_worker(records, port)))
+
+
+def bench(workers: int, port: int) -> float:
+    records = [make_record(i) for i in range(RECORDS_PER_WORKER * workers)]
+    ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+    go = multiprocessing.Event()
+    procs = [
+        multiprocessing.Process(
+            target=worker_main,
+            args=(shard_records(records, i, workers), port, ready, go, results),
+        )
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.get()
+    start = time.perf_counter()
+    go.set()
+    done = sum(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+    return done / elapsed
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_worker_scaling():
+    port = free_port()
+    server = multiprocessing.Process(target=serve_upstream, args=(port,), daemon=True)
+    server.start()
+    time.sleep(1)
+
+    # Mock-only: pipeline and HTTP throughput per process, not the claim query
+    print("\n Worker scaling against local mock upstream (claims mocked)\n")
+    baseline = None
+    try:
+        for workers in (1, 2, 4):
+            throughput = bench(workers, port)
+            baseline = baseline or throughput
+            print(
+                f"{workers} worker(s) → {throughput:.1f} reservations/s "
+                f"(×{throughput / baseline:.2f}, ideal ×{workers})"
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method("spawn")
+    test_worker_scaling()
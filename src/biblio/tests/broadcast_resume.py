@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.biblio.utils.broadcast import keep_resuming_broadcasts
+
+BROADCAST = "src.biblio.utils.broadcast"
+
+LEASE = 0.5  # seconds left on the dead sender's lease, scaled down for test speed
+RESUME_INTERVAL = 0.1
+RECIPIENTS = 5
+
+
+class FakeBroadcasts:
+    """One broadcast left half-sent by a worker that died with its lease still live."""
+
+    def __init__(self):
+        self.lease_expires_at = time.monotonic() + LEASE
+        self.finished = False
+        self.pending = [
+            {"position": i, "chat_id": 1000 + i, "texts": ["Hello"]}
+            for i in range(RECIPIENTS)
+        ]
+
+    async def claim(self, lease_seconds: int) -> list[dict]:
+        if self.finished or time.monotonic() < self.lease_expires_at:
+            return []
+        self.lease_expires_at = time.monotonic() + lease_seconds
+        row = {"id": "b1", "total": RECIPIENTS, "sent": 0, "failed": 0}
+        return [row]
+
+    async def recipients(self, broadcast_id: str, limit: int) -> list[dict]:
+        return self.pending[:limit]
+
+    async def progress(self, broadcast_id, delivered, failed, lease_seconds) -> bool:
+        done = set(delivered) | {position for position, _ in failed}
+        self.pending = [r for r in self.pending if r["position"] not in done]
+        return True
+
+    async def finish(self, broadcast_id: str) -> None:
+        self.finished = True
+
+
+async def test_resume_after_lease_expiry():
+    table = FakeBroadcasts()
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+
+    with (
+        patch(f"{BROADCAST}.claim_broadcasts", table.claim),
+        patch(f"{BROADCAST}.fetch_broadcast_recipients", table.recipients),
+        patch(f"{BROADCAST}.record_broadcast_progress", table.progress),
+        patch(f"{BROADCAST}.record_delivery_results", AsyncMock()),
+        patch(f"{BROADCAST}.finish_broadcast", table.finish),
+    ):
+        task = asyncio.create_task(keep_resuming_broadcasts(bot, RESUME_INTERVAL))
+        try:
+            await asyncio.sleep(LEASE / 2)
+            assert bot.send_message.await_count == 0, "resumed under a live lease"
+
+            await asyncio.sleep(LEASE + 5 * RESUME_INTERVAL)
+            assert table.finished, "not resumed after the lease expired"
+            assert bot.send_message.await_count == RECIPIENTS
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    print("Broadcast resumed once its lease expired, not before")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(test_resume_after_lease_expiry())
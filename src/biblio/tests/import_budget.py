@@ -0,0 +1,54 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+BUDGETS = {"main": 0.8, "jobs_main": 0.8}  # seconds of cumulative import time
+LAZY_MODULES = ("pandas", "matplotlib", "pygsheets", "playwright.async_api")
+ENTRY_ONLY_LAZY = {"main": ("fastapi", "uvicorn")}  # loaded when the server starts
+ROUNDS = 3
+IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)")
+
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    """Cumulative import time of `module` in a fresh interpreter, and what it loaded."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds, loaded = 0.0, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        loaded.add(match[2])
+        if match[2] == module:
+            seconds = int(match[1]) / 1e6
+    return seconds, loaded
+
+
+def test_import_budget():
+    print("\n Import time per entry point (best of 3)\n")
+    over = []
+    for module, budget in BUDGETS.items():
+        profiles = [import_profile(module) for _ in range(ROUNDS)]
+        seconds = min(took for took, _ in profiles)
+        eager = [
+            lazy
+            for lazy in LAZY_MODULES + ENTRY_ONLY_LAZY.get(module, ())
+            if lazy in profiles[0][1]
+        ]
+        print(f"{module:<10} → {seconds:.2f}s (budget {budget:.2f}s) eager: {eager}")
+        if seconds > budget or eager:
+            over.append(module)
+    assert not over, f"import budget exceeded by {over}"
+
+
+if __name__ == "__main__":
+    test_import_budget()
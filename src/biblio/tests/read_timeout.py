@@ -10,17 +10,18 @@ from src.biblio.jobs import process_reservation
 from src.biblio.reservation.reservation import calculate_timeout
 
 
-async def fake_set_reservation(start, end, duration, user_data, timeout):
+async def fake_set_reservation(start, end, duration, user_data, timeout, **kwargs):
     delay = timeout.read / 100  # Scale down for test speed
     await asyncio.sleep(delay)
     raise Exception(f"Simulated failure after {delay:.1f}s")
 
 
+@patch("src.biblio.jobs.acquire_recaptcha_token", new_callable=AsyncMock)
 @patch("src.biblio.jobs.set_reservation", new_callable=AsyncMock)
 @patch("src.biblio.jobs.confirm_reservation", new_callable=AsyncMock)
 @patch("src.biblio.jobs.update_record", new_callable=AsyncMock)
 async def test_single_record_retry_delay(
-    mock_update, mock_confirm, mock_set_reservation
+    mock_update, mock_confirm, mock_set_reservation, mock_token
 ):
     mock_set_reservation.side_effect = fake_set_reservation
 
@@ -32,14 +33,14 @@ async def test_single_record_retry_delay(
         "start_time": dtime(hour=20, minute=30),
         "end_time": dtime(hour=21, minute=30),
         "selected_duration": 1,
-        "codice_fiscale": "ABC123",
+        "codice_fiscale": "RSSMRA85T10H501Z",  # passes validate_user_data
         "name": "Test User",
         "email": "test@example.com",
         "booking_code": "",
         "chat_id": None,
+        "priority": 0,  # PRIORITY_RETRY_LIMIT keeps all 20 attempts retrying
     }
 
-    bot = AsyncMock()
     logging.basicConfig(level=logging.DEBUG)
 
     print("\n Starting timeout scaling test\n")
@@ -51,7 +52,7 @@ async def test_single_record_retry_delay(
         record = base_record.copy()
         record["retries"] = retries
         start = asyncio.get_event_loop().time()
-        result = await process_reservation(record, bot)
+        result = await process_reservation(record)
         end = asyncio.get_event_loop().time()
 
         timeout = calculate_timeout(retries)
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from src.biblio.config.config import Status, connect_db, load_env, shard_lock_name
+from src.biblio.db.build import build_db
+from src.biblio.db.fetch import claim_reservations
+from src.biblio.utils.scheduler import LeaderElection
+
+SHARD_COUNT = 2
+
+
+async def add_due_retry(conn) -> tuple[str, int]:
+    """A retry due 5 minutes ago, well past SHARD_STEAL_SECONDS; returns (id, shard)."""
+    user = await conn.fetchrow(
+        """
+        INSERT INTO users (chat_id, codice_fiscale, name, email)
+        VALUES (0, 'RSSMRA85T10H501Z', 'Shard Steal', 'shard-steal@example.com')
+        ON CONFLICT (codice_fiscale, email, name) DO UPDATE SET chat_id = 0
+        RETURNING id, (hashtext(id::text) & 2147483647) % $1 AS shard
+        """,
+        SHARD_COUNT,
+    )
+    reservation_id = await conn.fetchval(
+        """
+        INSERT INTO reservations (
+            user_id, selected_date, start_time, end_time, selected_duration,
+            status, retries, next_attempt_at
+        )
+        VALUES ($1, $2, '20:30', '21:30', 1, $3, 1, now() - interval '5 minutes')
+        RETURNING id
+        """,
+        user["id"],
+        datetime.now(ZoneInfo("Europe/Rome")).date(),
+        Status.FAIL,
+    )
+    return reservation_id, user["shard"]
+
+
+async def test_non_owner_leaves_live_shard():
+    """Needs a scratch DATABASE_URL: the reservations it adds are deleted afterwards."""
+    await build_db()
+    conn = await connect_db()
+    owner = LeaderElection()
+    try:
+        reservation_id, shard = await add_due_retry(conn)
+        other = (shard + 1) % SHARD_COUNT
+
+        owner.register(shard_lock_name(shard))
+        await owner._poll()  # the owning worker is alive
+        claimed = await claim_reservations(limit=100, shard=(other, SHARD_COUNT))
+        assert reservation_id not in {r["id"] for r in claimed}, "stole a live shard"
+
+        await owner.stop()  # the owning worker died
+        claimed = await claim_reservations(limit=100, shard=(other, SHARD_COUNT))
+        assert reservation_id in {r["id"] for r in claimed}, "dead shard not taken over"
+        print("Non-owner left the live shard alone and took it over once it died")
+    finally:
+        await owner.stop()
+        await conn.execute(
+            "DELETE FROM users WHERE email = 'shard-steal@example.com'"
+        )
+        await conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    load_env("local")
+    asyncio.run(test_non_owner_leaves_live_shard())
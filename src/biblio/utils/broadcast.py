@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from src.biblio.db.fetch import claim_broadcasts, fetch_broadcast_recipients
+from src.biblio.db.insert import insert_broadcast
+from src.biblio.db.update import (
+    finish_broadcast,
+    record_broadcast_progress,
+    record_delivery_results,
+    release_broadcasts,
+)
+
+TELEGRAM_RATE = 25  # messages/s; Telegram allows about 30 per bot
+TELEGRAM_BURST = 5  # keeps any one-second window under the limit
+BROADCAST_CONCURRENCY = 20
+BROADCAST_CHUNK = 100  # recipients persisted per progress update
+BROADCAST_LEASE_SECONDS = 120
+BROADCAST_RESUME_SECONDS = 45  # under the lease, so a stale one waits at most one lease
+CHAT_MESSAGE_GAP = 1.0  # seconds between two messages to the same chat
+SEND_ATTEMPTS = 3  # per message, not counting flood-control waits
+CHAT_ERRORS = ("chat not found", "user is deactivated")  # BadRequests about the chat
+
+
+class TokenBucket:
+    """
+    Process-wide send budget. `acquire` hands out `rate` tokens per second with bursts
+    up to `burst`; waiters are served in arrival order. `pause` stops every sender for
+    the time Telegram asked for in a `RetryAfter`.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+TELEGRAM_LIMITER = TokenBucket(TELEGRAM_RATE, TELEGRAM_BURST)
+_running: set[str] = set()  # ids of broadcasts this process is sending
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+def is_unreachable(error: TelegramError) -> bool:
+    """Whether the chat refuses messages for good: bot blocked or user deactivated."""
+    return isinstance(error, Forbidden)
+
+
+def is_chat_error(error: TelegramError) -> bool:
+    """
+    Whether a failed send is down to the chat itself. Bad content, flood control and
+    network or server errors say nothing about the chat and must not count against it.
+    """
+    if is_unreachable(error):
+        return True
+    message = str(error).lower()
+    return isinstance(error, BadRequest) and any(m in message for m in CHAT_ERRORS)
+
+
+@dataclass
+class BroadcastResult:
+    broadcast_id: str
+    total: int = 0
+    sent: int = 0
+    failed: list[int] = field(default_factory=list)  # chat ids, this run only
+    duplicate: bool = False  # already started by an earlier run
+
+
+async def broadcast(
+    bot: Bot, broadcast_id: str, chat_ids: Iterable[int], *texts: str
+) -> BroadcastResult:
+    """
+    Send `texts`, in order, to every chat. `broadcast_id` makes the broadcast
+    idempotent: a second call with the same id sends nothing.
+    """
+    recipients = [(chat_id, None) for chat_id in dict.fromkeys(chat_ids)]
+    return await _start(bot, broadcast_id, list(texts), recipients)
+
+
+async def broadcast_messages(
+    bot: Bot, broadcast_id: str, messages: Iterable[tuple[int, str]]
+) -> BroadcastResult:
+    """Like `broadcast`, with a text per (chat_id, text), kept in order per chat."""
+    by_chat: dict[int, list[str]] = {}
+    for chat_id, text in messages:
+        by_chat.setdefault(chat_id, []).append(text)
+    return await _start(bot, broadcast_id, [], list(by_chat.items()))
+
+
+async def keep_resuming_broadcasts(
+    bot: Bot, interval: float = BROADCAST_RESUME_SECONDS
+) -> None:
+    """
+    Resume interrupted broadcasts every `interval` seconds. A broadcast left by a worker
+    that died is only claimable once its lease expires, which may be well after startup.
+    """
+    while True:
+        try:
+            await resume_broadcasts(bot)
+        except Exception as e:
+            logging.error(f"[BROADCAST] ❌ Resuming broadcasts failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def resume_broadcasts(bot: Bot) -> None:
+    """Finish broadcasts interrupted by a redeploy or crash."""
+    for row in await claim_broadcasts(BROADCAST_LEASE_SECONDS):
+        if row["id"] in _running:  # a slow chunk let our own lease lapse
+            continue
+        done = row["sent"] + row["failed"]
+        logging.info(f"[BROADCAST] Resuming {row['id']} at {done}/{row['total']}")
+        await _run(bot, BroadcastResult(row["id"], total=row["total"]))
+
+
+async def _start(
+    bot: Bot,
+    broadcast_id: str,
+    texts: list[str],
+    recipients: list[tuple[int, list[str] | None]],
+) -> BroadcastResult:
+    result = BroadcastResult(broadcast_id, total=len(recipients))
+    if not recipients:
+        return result
+    if not await insert_broadcast(
+        broadcast_id, texts, recipients, BROADCAST_LEASE_SECONDS
+    ):
+        logging.info(f"[BROADCAST] {broadcast_id} already exists — skipped")
+        result.duplicate = True
+        return result
+    return await _run(bot, result)
+
+
+async def release_broadcast_leases() -> None:
+    """Hand unfinished broadcasts back on shutdown for the next instance to resume."""
+    try:
+        released = await release_broadcasts()
+    except Exception as e:
+        logging.error(f"[BROADCAST] ❌ Releasing leases failed, they will expire: {e}")
+        return
+    if released:
+        logging.info(f"[BROADCAST] Released {len(released)} unfinished broadcasts")
+
+
+async def _run(bot: Bot, result: BroadcastResult) -> BroadcastResult:
+    _running.add(result.broadcast_id)
+    try:
+        return await _send_all(bot, result)
+    finally:
+        _running.discard(result.broadcast_id)
+
+
+async def _send_all(bot: Bot, result: BroadcastResult) -> BroadcastResult:
+    semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+    start = time.perf_counter()
+
+    async def _deliver_bounded(row: dict) -> TelegramError | None:
+        async with semaphore:
+            return await _deliver(bot, row["chat_id"], row["texts"])
+
+    while rows := await fetch_broadcast_recipients(
+        result.broadcast_id, BROADCAST_CHUNK
+    ):
+        errors = await asyncio.gather(*(_deliver_bounded(row) for row in rows))
+        delivered, failed, reached, failures = [], [], [], []
+        for row, error in zip(rows, errors):
+            if error is None:
+                delivered.append(row["position"])
+                reached.append(row["chat_id"])
+            else:
+                failed.append((row["position"], str(error)))
+                result.failed.append(row["chat_id"])
+                if is_chat_error(error):
+                    failures.append(
+                        (row["chat_id"], str(error), is_unreachable(error))
+                    )
+        result.sent += len(delivered)
+        await record_delivery_results(reached, failures)
+        if not await record_broadcast_progress(
+            result.broadcast_id, delivered, failed, BROADCAST_LEASE_SECONDS
+        ):
+            logging.warning(
+                f"[BROADCAST] ⚠️ {result.broadcast_id} was taken over — stopping"
+            )
+            return result
+        logging.info(
+            f"[BROADCAST] {result.broadcast_id}: {result.sent} sent, "
+            f"{len(result.failed)} failed of {result.total}"
+        )
+
+    await finish_broadcast(result.broadcast_id)
+    logging.info(
+        f"[BROADCAST] ✅ {result.broadcast_id} finished in "
+        f"{time.perf_counter() - start:.1f}s — {result.sent} sent, "
+        f"{len(result.failed)} failed"
+    )
+    return result
+
+
+async def _deliver(bot: Bot, chat_id: int, texts: list[str]) -> TelegramError | None:
+    """Send a chat its texts in order; returns the error that stopped it, if any."""
+    for index, text in enumerate(texts):
+        if index:
+            await asyncio.sleep(CHAT_MESSAGE_GAP)
+        failures = 0
+        while True:
+            await TELEGRAM_LIMITER.acquire()
+            try:
+                await bot.send_message(
+                    chat_id=chat_id, text=text, parse_mode="Markdown"
+                )
+                break
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+                logging.warning(f"[BROADCAST] ⏸️ Flood control for {delay:.0f}s")
+                TELEGRAM_LIMITER.pause(delay)
+            except (Forbidden, BadRequest) as e:
+                logging.warning(f"[BROADCAST] Not delivered to {chat_id}: {e}")
+                return e
+            except TelegramError as e:
+                failures += 1
+                if failures >= SEND_ATTEMPTS:
+                    logging.error(f"[BROADCAST] ❌ Failed to notify {chat_id}: {e}")
+                    return e
+                await asyncio.sleep(2**failures)
+    return None
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import TYPE_CHECKING
+
+from cachetools import LRUCache
+
+from src.biblio.utils.utils import plot_slot_history
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+CHART_WORKERS = 2
+CHART_CACHE_SIZE = 256  # file ids are tiny; images only until their first upload
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _render_slot_history(
+    df: "DataFrame", date: str, slot: str, start: str, end: str
+) -> bytes:
+    return plot_slot_history(df, date, slot, start, end=end).getvalue()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the parent runs an event loop and asyncpg/httpx threads
+        _pool = ProcessPoolExecutor(
+            max_workers=CHART_WORKERS, mp_context=get_context("spawn")
+        )
+    return _pool
+
+
+async def render_slot_history(
+    df: "DataFrame", date: str, slot: str, start: str, end: str
+) -> bytes:
+    """Render the chart in a worker process so plotting never blocks the bot."""
+    global _pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_pool(), _render_slot_history, df, date, slot, start, end
+        )
+    except BrokenProcessPool:
+        logging.error("[CHARTS] ❌ Render pool died — starting a new one")
+        _pool = None
+        raise
+
+
+def shutdown_chart_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class ChartCache:
+    """
+    Charts of days that can no longer change, by (date, slot, start, end). An entry
+    holds the rendered image until it has been sent once, then the Telegram file_id,
+    so repeat views are resent by id without rendering or uploading again.
+    """
+
+    def __init__(self, max_charts: int = CHART_CACHE_SIZE):
+        self._charts: LRUCache = LRUCache(maxsize=max_charts)
+
+    def get(self, key: tuple[str, str, str, str]) -> bytes | str | None:
+        return self._charts.get(key)
+
+    def put(self, key: tuple[str, str, str, str], photo: bytes | str) -> None:
+        self._charts[key] = photo
+
+
+SLOT_CHARTS = ChartCache()
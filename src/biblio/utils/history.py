@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+from cachetools import LRUCache
+
+from src.biblio.db.fetch import fetch_slot_history
+from src.biblio.db.records import SlotPoint
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+HISTORY_CACHED_DAYS = 7  # the picker offers today and the 5 days before
+TODAY_REFRESH_SECONDS = 60  # snapshots are taken every few minutes
+
+
+def is_final_day(day: date) -> bool:
+    """Whether no snapshot can be added to `day` anymore."""
+    # UTC trails Rome, so a day over in UTC is over for the `slots` job too
+    return day < datetime.now(ZoneInfo("UTC")).date()
+
+
+@dataclass
+class _Day:
+    frame: "DataFrame | None"
+    final: bool  # fetched after the day was over, never changes again
+    checked_at: float
+
+
+class SlotHistoryCache:
+    """
+    Process-wide slot history by day, shared by every user. Past days are fetched
+    once and kept until evicted; today is refreshed at most every
+    `refresh_seconds`, appending only the snapshots taken since the last one.
+
+    Returned frames are shared: callers copy before modifying them.
+    """
+
+    def __init__(
+        self,
+        max_days: int = HISTORY_CACHED_DAYS,
+        refresh_seconds: float = TODAY_REFRESH_SECONDS,
+    ):
+        self._days: LRUCache = LRUCache(maxsize=max_days)
+        self._lock = asyncio.Lock()
+        self._refresh_seconds = refresh_seconds
+
+    async def get(self, day: date | datetime) -> "DataFrame | None":
+        if isinstance(day, datetime):
+            day = day.date()
+        cached = self._days.get(day)
+        if self._fresh(cached):
+            return cached.frame
+        async with self._lock:  # one query per day, however many users ask at once
+            cached = self._days.get(day)
+            if not self._fresh(cached):
+                cached = await self._load(day, cached)
+                self._days[day] = cached
+        return cached.frame
+
+    def _fresh(self, cached: _Day | None) -> bool:
+        if cached is None:
+            return False
+        age = time.monotonic() - cached.checked_at
+        return cached.final or age < self._refresh_seconds
+
+    async def _load(self, day: date, cached: _Day | None) -> _Day:
+        import pandas as pd
+
+        final = is_final_day(day)
+        checked_at = time.monotonic()
+        if cached is None or cached.frame is None:
+            return _Day(_frame(await fetch_slot_history(date=day)), final, checked_at)
+
+        since = cached.frame["job_timestamp"].max()
+        new_rows = _frame(await fetch_slot_history(date=day, since=since))
+        if new_rows is None:
+            return _Day(cached.frame, final, checked_at)
+        frame = pd.concat([cached.frame, new_rows], ignore_index=True)
+        frame = frame.sort_values(["slot", "job_timestamp"], kind="stable")
+        logging.info(f"[HISTORY] Appended {len(new_rows)} snapshots to {day}")
+        return _Day(frame.reset_index(drop=True), final, checked_at)
+
+
+def _frame(points: list[SlotPoint]) -> "DataFrame | None":
+    """Charts work on whole days at once, so the cache keeps a DataFrame."""
+    if not points:
+        return None
+    import pandas as pd
+
+    return pd.DataFrame(
+        [(p.job_timestamp, p.slot, p.available) for p in points],
+        columns=["job_timestamp", "slot", "available"],
+    )
+
+
+SLOT_HISTORY_CACHE = SlotHistoryCache()
@@ -1,15 +1,18 @@
 from datetime import datetime, timedelta
 from enum import StrEnum
 from math import ceil
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
-from pandas import DataFrame
 from telegram import KeyboardButton, ReplyKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from src.biblio.config.config import RAILWAY_SERVICES, Schedule, UserDataKey
 from src.biblio.utils.utils import generate_days
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 LIB_SCHEDULE = Schedule.weekly()
 
 
@@ -40,6 +43,8 @@ class Label(StrEnum):
     HELP = "❓ Help"
     HISTORY = "📊 Slots History"
     HOME = "🏠 Home"
+    OLDER_RESERVATIONS = "⏪ Older"
+    PAST_RESERVATIONS = "🗂️ Past Reservations"
     RESERVATION_TYPE_BACK = "⬅️ Back to reservation type"
     RESERVATION_TYPE_EDIT = "⬅️ Edit reservation type"
     RETRY = "🆕 Let's go again!"
@@ -134,7 +139,10 @@ class Keyboard:
                 KeyboardButton(Label.AVAILABLE_SLOTS),
             ],
             [KeyboardButton(Label.SLOT_LATER), KeyboardButton(Label.SLOT_INSTANT)],
-            [KeyboardButton(Label.CURRENT_RESERVATIONS)],
+            [
+                KeyboardButton(Label.CURRENT_RESERVATIONS),
+                KeyboardButton(Label.PAST_RESERVATIONS),
+            ],
             [KeyboardButton(Label.CANCEL_RESERVATION)],
             [KeyboardButton(Label.CREDENTIALS_EDIT)],
             [KeyboardButton(Label.AGREEMENT), KeyboardButton(Label.HELP)],
@@ -220,7 +228,7 @@ class Keyboard:
         return ReplyKeyboardMarkup(keyboard_buttons, resize_keyboard=True)
 
     @staticmethod
-    def slot(history: DataFrame):
+    def slot(history: "DataFrame"):
         slots = list(history["slot"].unique())
         n = 3
         keyboard_buttons = [
@@ -336,6 +344,13 @@ class Keyboard:
         keyboard_buttons.append([KeyboardButton(Label.RESERVATION_TYPE_BACK)])
         return ReplyKeyboardMarkup(keyboard_buttons, resize_keyboard=True)
 
+    @staticmethod
+    def past_reservations(has_more: bool):
+        keyboard_buttons = [[KeyboardButton(Label.HOME)]]
+        if has_more:
+            keyboard_buttons.insert(0, [KeyboardButton(Label.OLDER_RESERVATIONS)])
+        return ReplyKeyboardMarkup(keyboard_buttons, resize_keyboard=True)
+
     @staticmethod
     def cancelation_confirm():
         keyboard_buttons = [
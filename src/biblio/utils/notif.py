@@ -7,15 +7,35 @@ from zoneinfo import ZoneInfo
 
 import aiofiles
 from telegram import Bot
-from telegram.error import Forbidden, TelegramError
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
 
 from src.biblio.config.config import Status
 from src.biblio.db.fetch import (
+    NOTIFY_MAX_ATTEMPTS,
+    claim_notifications,
     fetch_all_user_chat_ids,
-    fetch_reservations,
+    fetch_reminder_chat_ids,
+    fetch_reservations_starting_at,
     fetch_setting,
 )
-from src.biblio.db.update import upsert_setting
+from src.biblio.db.update import (
+    mark_notifications,
+    record_delivery_results,
+    upsert_setting,
+)
+from src.biblio.utils.broadcast import (
+    TELEGRAM_LIMITER,
+    broadcast,
+    broadcast_messages,
+    is_chat_error,
+    is_unreachable,
+    retry_after_seconds,
+)
+
+NOTIFY_BATCH = 50
+NOTIFY_CONCURRENCY = 10
+NOTIFY_RETRY_SECONDS = 30  # doubled after every failed send of the same message
+NOTIFY_RETRY_MAX_SECONDS = 900
 
 DEPLOY_NOTIF = textwrap.dedent(
     """
@@ -89,15 +109,74 @@ DONATION_NOTIF_ENG = textwrap.dedent(
 )
 
 
-async def _safe_notify(bot: Bot, chat_id: int, text: str, context: str) -> None:
-    try:
-        await bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
-    except Forbidden:
-        logging.warning(
-            f"[{context.upper()}] Bot was blocked by user {chat_id}, skipping."
-        )
-    except TelegramError as e:
-        logging.error(f"[{context.upper()}] Failed to notify {chat_id}: {e}")
+async def dispatch_notifications(bot: Bot, limit: int = NOTIFY_BATCH) -> int:
+    """
+    Send the reservation notifications left pending by finalization and record the
+    outcome per row. Messages to one chat go out in order; failed sends are retried on
+    a later run without touching the reservation itself. Returns the number delivered.
+    """
+    rows = await claim_notifications(limit)
+    if not rows:
+        return 0
+
+    by_chat: dict[int, list[dict]] = {}
+    for row in rows:
+        by_chat.setdefault(row["chat_id"], []).append(row)
+
+    delivered, deferred, dropped = [], [], []
+    reached, failures = [], []  # per chat, for the users' delivery state
+    semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+
+    async def _send_chat(chat_id: int, chat_rows: list[dict]) -> None:
+        async with semaphore:
+            for row in chat_rows:
+                await TELEGRAM_LIMITER.acquire()
+                try:
+                    await bot.send_message(
+                        chat_id=chat_id,
+                        text=row["notification_text"],
+                        parse_mode="Markdown",
+                    )
+                    delivered.append(row["id"])
+                    reached.append(chat_id)
+                except (Forbidden, BadRequest) as e:
+                    logging.warning(
+                        f"[NOTIF] Dropping notification for ID {row['id']} to {chat_id}: {e}"
+                    )
+                    dropped.append(row["id"])
+                    if is_chat_error(e):
+                        failures.append((chat_id, str(e), is_unreachable(e)))
+                except TelegramError as e:
+                    delay = _retry_delay(e, row["notify_attempts"])
+                    if isinstance(e, RetryAfter):
+                        TELEGRAM_LIMITER.pause(delay)
+                    deferred.append((row["id"], delay))
+                    if row["notify_attempts"] + 1 >= NOTIFY_MAX_ATTEMPTS:
+                        logging.error(
+                            f"[NOTIF] ❌ Giving up on notification for ID {row['id']}: {e}"
+                        )
+                    else:
+                        logging.warning(
+                            f"[NOTIF] ⚠️ Notification for ID {row['id']} deferred: {e}"
+                        )
+                    break  # later messages of this chat wait for their lease to expire
+
+    await asyncio.gather(
+        *(_send_chat(chat_id, chat_rows) for chat_id, chat_rows in by_chat.items())
+    )
+    await mark_notifications(delivered, deferred, dropped, NOTIFY_MAX_ATTEMPTS)
+    await record_delivery_results(reached, failures)
+    logging.info(
+        f"[NOTIF] Dispatched {len(delivered)}/{len(rows)} notifications "
+        f"({len(deferred)} deferred, {len(dropped)} dropped)"
+    )
+    return len(delivered)
+
+
+def _retry_delay(error: TelegramError, attempts: int) -> float:
+    if isinstance(error, RetryAfter):
+        return retry_after_seconds(error)
+    return min(NOTIFY_RETRY_SECONDS * 2**attempts, NOTIFY_RETRY_MAX_SECONDS)
 
 
 async def notify_deployment(bot: Bot) -> None:
@@ -143,11 +222,7 @@ async def notify_deployment(bot: Bot) -> None:
     logging.info("[DEPLOY] New Railway deployment detected — notifying users.")
 
     chat_ids = await fetch_all_user_chat_ids()
-    tasks = [
-        _safe_notify(bot=bot, chat_id=chat_id, text=DEPLOY_NOTIF, context="deploy")
-        for chat_id in chat_ids
-    ]
-    await asyncio.gather(*tasks)
+    await broadcast(bot, f"deploy:{current_id}", chat_ids, DEPLOY_NOTIF)
 
 
 async def notify_maintenance(bot: Bot, enabled: bool) -> None:
@@ -156,37 +231,24 @@ async def notify_maintenance(bot: Bot, enabled: bool) -> None:
     logging.info(f"[MAINTENANCE] Notifying users: maintenance {state}.")
 
     chat_ids = await fetch_all_user_chat_ids()
-    tasks = [
-        _safe_notify(bot=bot, chat_id=chat_id, text=text, context="maintenance")
-        for chat_id in chat_ids
-    ]
-    await asyncio.gather(*tasks)
+    now = datetime.now(ZoneInfo("Europe/Rome"))
+    await broadcast(bot, f"maintenance:{state}:{now:%Y-%m-%d %H:%M:%S}", chat_ids, text)
 
 
 async def notify_reminder(bot: Bot) -> None:
     tomorrow = datetime.now(ZoneInfo("Europe/Rome")) + timedelta(days=1)
 
-    reservations = await fetch_reservations(
-        statuses=[Status.PENDING], date=tomorrow.date()
-    )
-    all_chat_ids = await fetch_all_user_chat_ids()
-    pending_chat_ids = [res["chat_id"] for res in reservations]
-    to_notify_chat_ids = set(all_chat_ids) - set(pending_chat_ids)
-    if not to_notify_chat_ids:
+    chat_ids = await fetch_reminder_chat_ids(tomorrow.date(), [Status.PENDING])
+    if not chat_ids:
         logging.info("[NOTIF] No users to notify.")
         return
 
-    tasks = [
-        _safe_notify(bot=bot, chat_id=chat_id, text=REMINDER, context="deploy")
-        for chat_id in to_notify_chat_ids
-    ]
-    await asyncio.gather(*tasks)
-    logging.info(f"[NOTIF] Sent {len(tasks)} reminders for tomorrow")
+    result = await broadcast(bot, f"reminder:{tomorrow.date()}", chat_ids, REMINDER)
+    logging.info(f"[NOTIF] Sent {result.sent} reminders for tomorrow")
 
 
 async def notify_reservation_activation(bot: Bot) -> None:
     now = datetime.now(ZoneInfo("Europe/Rome"))
-    reservations = await fetch_reservations(statuses=[Status.SUCCESS])
 
     # Determine reminder targets for "before" and "after" cases
     if now.minute == 15:
@@ -199,6 +261,9 @@ async def notify_reservation_activation(bot: Bot) -> None:
     else:
         return
 
+    reservations = await fetch_reservations_starting_at(
+        now.date(), [past_time], [Status.SUCCESS]
+    )  # add upcoming_time once the "before" reminders are back
     reminders_to_send = []
     for reservation in reservations:
         start_time = reservation["start_time"]
@@ -214,7 +279,7 @@ async def notify_reservation_activation(bot: Bot) -> None:
         logging.info("[NOTIF] No matching reservations for reminder times.")
         return
 
-    tasks = []
+    messages = []
     for reservation, slot_time, phase in reminders_to_send:
         if phase == "before":  # Skip reminders for the "before" phase for now
             continue
@@ -252,45 +317,22 @@ async def notify_reservation_activation(bot: Bot) -> None:
             """
         )
 
-        task = _safe_notify(
-            bot=bot,
-            chat_id=reservation["chat_id"],
-            text=message,
-            context="reminder",
-        )
-        tasks.append(task)
-
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+        messages.append((reservation["chat_id"], message))
 
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            logging.error(
-                f"[NOTIF] Error sending reminder to {reminders_to_send[i][0]['chat_id']}: {result}"
-            )
-        else:
-            logging.info(
-                f"[NOTIF] Sent reminder for chat_id {reminders_to_send[i][0]['chat_id']}"
-            )
+    result = await broadcast_messages(
+        bot, f"activation:{now:%Y-%m-%d %H:%M}", messages
+    )
+    logging.info(f"[NOTIF] Sent {result.sent} activation reminders")
 
 
-# TODO: Refactor w/ asyncio.gather
 async def notify_donation(bot: Bot) -> None:
-    chat_ids = await fetch_all_user_chat_ids()
-    sent = 0
-    for chat_id in chat_ids:
-        if chat_id == os.getenv("BOTLORD_CHAT_ID"):
-            continue
-        try:
-            await bot.send_message(
-                chat_id=chat_id, text=DONATION_NOTIF_ENG, parse_mode="Markdown"
-            )
-            await bot.send_message(
-                chat_id=chat_id, text=DONATION_NOTIF, parse_mode="Markdown"
-            )
-            sent += 1
-        except Forbidden:
-            logging.warning(f"[NOTIF] Bot was blocked by user {chat_id}, skipping.")
-        except Exception as e:
-            logging.error(f"[NOTIF] Failed to send to {chat_id}: {e}")
-
-    logging.info(f"[NOTIF] Sent {sent} donation notifications.")
+    chat_ids = [
+        chat_id
+        for chat_id in await fetch_all_user_chat_ids()
+        if str(chat_id) != os.getenv("BOTLORD_CHAT_ID")
+    ]
+    today = datetime.now(ZoneInfo("Europe/Rome")).date()
+    result = await broadcast(
+        bot, f"donation:{today}", chat_ids, DONATION_NOTIF_ENG, DONATION_NOTIF
+    )
+    logging.info(f"[NOTIF] Sent {result.sent} donation notifications.")
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import logging
+import pickle
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from src.biblio.config.config import UserDataKey
+from src.biblio.db.fetch import fetch_bot_state
+from src.biblio.db.update import write_bot_state
+from src.biblio.utils.user_data import is_dataframe
+
+PERSISTENCE_INTERVAL = 30  # seconds between two persistence runs of the application
+FLUSH_DELAY = 1.0  # collects the updates of one run into a single write
+TRANSIENT_USER_DATA_KEYS = frozenset(  # references into the in-process heavy cache
+    {UserDataKey.CANCELATION_CHOICES}
+)
+USER_DATA = "user_data"
+
+
+class PostgresPersistence(BasePersistence):
+    """
+    Keeps `user_data` and conversation states in the `bot_state` table, so a redeploy
+    does not send every user back to /start.
+
+    Every `update_interval` the application hands over the entries touched since the
+    last run. They are pickled and compared with what was last written; only changed
+    entries are staged, and one delayed flush writes them in a single transaction.
+    DataFrames and TRANSIENT_USER_DATA_KEYS are never stored.
+    """
+
+    def __init__(self, update_interval: float = PERSISTENCE_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False, chat_data=False, user_data=True, callback_data=False
+            ),
+            update_interval=update_interval,
+        )
+        self._written: dict[tuple[str, str], bytes] = {}  # digests of stored rows
+        self._pending: dict[tuple[str, str], bytes | None] = {}  # None deletes
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def get_user_data(self) -> dict[int, dict]:
+        return {
+            int(key): value for key, value in (await self._load(USER_DATA)).items()
+        }
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        rows = await self._load(_conversation_kind(name))
+        return {tuple(json.loads(key)): state for key, state in rows.items()}
+
+    async def update_conversation(
+        self, name: str, key: tuple, new_state: object | None
+    ) -> None:
+        self._stage(_conversation_kind(name), json.dumps(list(key)), new_state)
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        storable = {
+            k: v
+            for k, v in data.items()
+            if k not in TRANSIENT_USER_DATA_KEYS and not is_dataframe(v)
+        }
+        self._stage(USER_DATA, str(user_id), storable or None)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data: object) -> None:
+        pass
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._stage(USER_DATA, str(user_id), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def flush(self) -> None:
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            upserts = [(*k, blob) for k, blob in pending.items() if blob is not None]
+            deletes = [k for k, blob in pending.items() if blob is None]
+            try:
+                await write_bot_state(upserts, deletes)
+            except Exception as e:
+                logging.error(
+                    f"[PERSISTENCE] ❌ Flush of {len(pending)} rows failed: {e}"
+                )
+                for k, blob in pending.items():  # retry with the next flush
+                    self._pending.setdefault(k, blob)
+                return
+            for kind, key, blob in upserts:
+                self._written[(kind, key)] = _digest(blob)
+            for k in deletes:
+                self._written.pop(k, None)
+        logging.info(
+            f"[PERSISTENCE] Flushed {len(upserts)} updates and {len(deletes)} deletes"
+        )
+
+    async def _load(self, kind: str) -> dict[str, object]:
+        loaded = {}
+        for key, blob in (await fetch_bot_state(kind)).items():
+            try:
+                loaded[key] = pickle.loads(blob)
+            except Exception as e:
+                logging.warning(f"[PERSISTENCE] Skipping unreadable {kind} {key}: {e}")
+                continue
+            self._written[(kind, key)] = _digest(blob)
+        logging.info(f"[PERSISTENCE] Restored {len(loaded)} {kind} entries")
+        return loaded
+
+    def _stage(self, kind: str, key: str, value: object | None) -> None:
+        blob = None if value is None else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self._written.get((kind, key)) == (blob and _digest(blob)):
+            self._pending.pop((kind, key), None)  # back to what is stored
+            return
+        self._pending[(kind, key)] = blob
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(FLUSH_DELAY)
+        await self.flush()
+
+
+def _conversation_kind(name: str) -> str:
+    return f"conversation:{name}"
+
+
+def _digest(blob: bytes) -> bytes:
+    return hashlib.blake2b(blob, digest_size=16).digest()
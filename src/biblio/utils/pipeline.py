@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+STAGE_LATENCY_SAMPLES = 100
+
+Handler = Callable[[Any], Awaitable[Any]]
+ErrorHandler = Callable[[Any, Exception], Awaitable[None]]
+
+
+class Stage:
+    def __init__(self, name: str, handler: Handler, concurrency: int, queue_size: int):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.active = 0
+        self.processed = 0
+        self._latency: deque[float] = deque(maxlen=STAGE_LATENCY_SAMPLES)
+
+    def record(self, seconds: float) -> None:
+        self.processed += 1
+        self._latency.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._latency:
+            return None
+        ordered = sorted(self._latency)
+        return ordered[min(len(ordered) - 1, max(math.ceil(q * len(ordered)) - 1, 0))]
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "active": self.active,
+            "workers": self.concurrency,
+            "processed": self.processed,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+        }
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues, each drained by its own worker pool.
+
+    A handler returns the item to hand to the next stage, or None once the item is done.
+    A worker that cannot hand over because the next queue is full waits, so a slow stage
+    pushes back on the ones before it instead of piling up work. An item whose handler
+    raises is dropped after `on_error` has been given the chance to clean it up.
+    """
+
+    def __init__(
+        self, name: str, stages: list[Stage], on_error: ErrorHandler | None = None
+    ):
+        self.name = name
+        self.stages = stages
+        self.on_error = on_error
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.concurrency):
+                self._workers.append(
+                    asyncio.create_task(
+                        self._work(index), name=f"{self.name}-{stage.name}-{n}"
+                    )
+                )
+
+    async def submit(self, item: Any) -> None:
+        await self.stages[0].queue.put(item)
+
+    def capacity(self) -> int:
+        """Free slots in the first queue — how much new work can be admitted now."""
+        queue = self.stages[0].queue
+        return max(queue.maxsize - queue.qsize(), 0)
+
+    async def join(self) -> None:
+        for stage in self.stages:  # items only move forward, so one pass suffices
+            await stage.queue.join()
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def stats(self) -> dict[str, dict]:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def log_stats(self) -> None:
+        parts = []
+        for name, s in self.stats().items():
+            latency = (
+                f"p50 {s['p50']:.2f}s / p95 {s['p95']:.2f}s"
+                if s["p50"] is not None
+                else "no samples"
+            )
+            parts.append(
+                f"{name}: {s['queued']} queued, {s['active']}/{s['workers']} busy, {latency}"
+            )
+        logging.info(f"[PIPELINE] {self.name} — " + " | ".join(parts))
+
+    async def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = await stage.queue.get()
+            try:
+                stage.active += 1
+                start = time.perf_counter()
+                try:
+                    item = await stage.handler(item)
+                except Exception as e:
+                    logging.error(f"[PIPELINE] ❌ {self.name}/{stage.name} failed: {e}")
+                    await self._drop(item, e)
+                    item = None
+                finally:
+                    stage.active -= 1
+                    stage.record(time.perf_counter() - start)
+                if item is not None and next_stage is not None:
+                    await next_stage.queue.put(item)
+            finally:
+                stage.queue.task_done()
+
+    async def _drop(self, item: Any, error: Exception) -> None:
+        if self.on_error is None:
+            return
+        try:
+            await self.on_error(item, error)
+        except Exception as e:
+            logging.error(f"[PIPELINE] ❌ {self.name} could not drop an item: {e}")
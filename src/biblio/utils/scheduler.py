@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+import asyncpg
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.base import BaseTrigger
+
+from src.biblio.config.config import connect_db, get_worker_id
+
+LEADER_LOCK_NAMESPACE = 4242  # first key of the two-key advisory lock form
+LEADER_POLL_SECONDS = 5
+
+
+class LeaderElection:
+    """
+    Elects one process per singleton job through Postgres session advisory locks.
+
+    A dedicated connection tries `pg_try_advisory_lock` for every job name it does not
+    hold yet and pings while it holds any. Locks die with the session, so when the
+    leader exits or loses its connection another instance takes over on its next poll.
+    """
+
+    def __init__(self, poll_seconds: float = LEADER_POLL_SECONDS):
+        self._poll_seconds = poll_seconds
+        self._names: set[str] = set()
+        self._held: set[str] = set()
+        self._conn: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str) -> None:
+        self._names.add(name)
+
+    def is_leader(self, name: str) -> bool:
+        return name in self._held
+
+    def start(self) -> None:
+        if self._task is None and self._names:
+            self._task = asyncio.create_task(self._run(), name="leader-election")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._disconnect()  # releases every lock at once
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._poll()
+            except Exception as e:
+                if self._held:
+                    logging.warning(f"[LEADER] ⚠️ Lost leadership of {sorted(self._held)}")
+                logging.error(f"[LEADER] ❌ Election failed: {e}")
+                await self._disconnect()
+            await asyncio.sleep(self._poll_seconds)
+
+    async def _poll(self) -> None:
+        if self._conn is None or self._conn.is_closed():
+            self._held.clear()
+            self._conn = await connect_db()
+        if self._held:
+            await self._conn.execute("SELECT 1")
+        for name in sorted(self._names - self._held):
+            acquired = await self._conn.fetchval(
+                "SELECT pg_try_advisory_lock($1, hashtext($2))",
+                LEADER_LOCK_NAMESPACE,
+                name,
+            )
+            if acquired:
+                self._held.add(name)
+                logging.info(f"[LEADER] 👑 {get_worker_id()} now runs {name}")
+
+    async def _disconnect(self) -> None:
+        self._held.clear()
+        if self._conn is not None and not self._conn.is_closed():
+            try:
+                await self._conn.close()
+            except Exception as e:
+                logging.warning(f"[LEADER] Closing election connection failed: {e}")
+        self._conn = None
+
+
+class JobScheduler:
+    """
+    The process-wide scheduler for every periodic job. Jobs added with
+    `singleton=True` run on exactly one instance across replicas; the rest run
+    everywhere they are registered.
+    """
+
+    def __init__(self, timezone: str = "Europe/Rome"):
+        self._timezone = timezone
+        self._scheduler: AsyncIOScheduler | None = None
+        self._election = LeaderElection()
+
+    def add_job(
+        self,
+        func: Callable[..., Awaitable],
+        trigger: BaseTrigger,
+        args: list | None = None,
+        kwargs: dict | None = None,
+        singleton: bool = False,
+        name: str | None = None,
+    ) -> None:
+        if self._scheduler is None:
+            self._scheduler = AsyncIOScheduler(timezone=self._timezone)
+        name = name or func.__name__
+        if singleton:
+            self._election.register(name)
+            self._scheduler.add_job(
+                self._run_singleton,
+                trigger,
+                args=[name, func, args or [], kwargs or {}],
+                name=name,
+            )
+        else:
+            self._scheduler.add_job(func, trigger, args=args, kwargs=kwargs, name=name)
+
+    def hold(self, name: str) -> None:
+        """Keep the election lock `name` while running, so others can see we are alive."""
+        self._election.register(name)
+
+    def start(self) -> None:
+        if self._scheduler is None:
+            return
+        if not self._scheduler.running:
+            self._scheduler.start()
+        self._election.start()
+
+    async def shutdown(self) -> None:
+        if self._scheduler is not None and self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+        self._scheduler = None
+        await self._election.stop()
+
+    async def _run_singleton(
+        self, name: str, func: Callable[..., Awaitable], args: list, kwargs: dict
+    ) -> None:
+        if not self._election.is_leader(name):
+            return
+        await func(*args, **kwargs)
@@ -0,0 +1,117 @@
+import logging
+import resource
+import sys
+from collections.abc import Mapping
+from uuid import uuid4
+
+from cachetools import TTLCache
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from src.biblio.config.config import UserDataKey
+
+CONVERSATION_TIMEOUT = 30 * 60  # seconds; overridden by CONVERSATION_TIMEOUT env
+HEAVY_CACHE_BYTES = 64 * 2**20  # shared by every user of the process
+MEMORY_REPORT_INTERVAL = 15 * 60
+MEMORY_REPORT_TOP_KEYS = 5
+IDLE_CLEARED_KEYS = (  # per-flow state, dropped when a conversation goes idle
+    UserDataKey.SELECTED_DATE_HISTORY,
+    UserDataKey.SLOT,
+    UserDataKey.FILTER_START,
+    UserDataKey.FILTER_END,
+    UserDataKey.CANCELATION_CHOICES,
+    UserDataKey.CANCELATION_CHOSEN_SLOT_ID,
+    UserDataKey.PAST_RESERVATIONS_CURSOR,
+)
+
+
+def is_dataframe(value: object) -> bool:
+    """Without importing pandas: if it is not loaded, no DataFrame exists."""
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(value, pandas.DataFrame)
+
+
+def deep_size(value: object) -> int:
+    """Approximate bytes held by `value`, following containers and DataFrames."""
+    if is_dataframe(value):
+        return int(value.memory_usage(deep=True).sum())
+    size = sys.getsizeof(value)
+    if isinstance(value, Mapping):
+        size += sum(deep_size(k) + deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item) for item in value)
+    return size
+
+
+def heavy_values_cache(ttl: float = CONVERSATION_TIMEOUT) -> TTLCache:
+    return TTLCache(maxsize=HEAVY_CACHE_BYTES, ttl=ttl, getsizeof=deep_size)
+
+
+HEAVY_VALUES = heavy_values_cache()
+
+
+def configure_heavy_values(conversation_timeout: float) -> None:
+    """
+    Expire stashed values with the conversations that own them. Called with the
+    resolved timeout when the app is built, before anything is stashed.
+    """
+    global HEAVY_VALUES
+    HEAVY_VALUES = heavy_values_cache(conversation_timeout)
+
+
+def stash(user_data: dict, key: UserDataKey, value: object) -> None:
+    """
+    Keep a heavy `value` in the shared, size-bounded cache and only its reference in
+    `user_data`. It may be evicted at any time: readers must cope with `unstash`
+    returning None.
+    """
+    discard(user_data, key)
+    ref = f"{key}:{uuid4().hex}"
+    if deep_size(value) < HEAVY_CACHE_BYTES:
+        HEAVY_VALUES[ref] = value
+    user_data[key] = ref
+
+
+def unstash(user_data: dict, key: UserDataKey) -> object | None:
+    ref = user_data.get(key)
+    return HEAVY_VALUES.get(ref) if isinstance(ref, str) else None
+
+
+def discard(user_data: dict, key: UserDataKey) -> None:
+    ref = user_data.pop(key, None)
+    if isinstance(ref, str):
+        HEAVY_VALUES.pop(ref, None)
+
+
+async def expire_conversation(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """Runs on `conversation_timeout`; keeps credentials, drops the flow's state."""
+    for key in IDLE_CLEARED_KEYS:
+        discard(context.user_data, key)
+    logging.info(f"⌛ Conversation of {update.effective_user} expired")
+
+
+def user_data_report(user_data: Mapping[int, Mapping]) -> dict[str, int]:
+    """Bytes held per user_data key across all users, largest first."""
+    sizes: dict[str, int] = {}
+    for data in user_data.values():
+        for key, value in data.items():
+            sizes[str(key)] = sizes.get(str(key), 0) + deep_size(value)
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
+
+
+async def log_user_data_report(context: ContextTypes.DEFAULT_TYPE) -> None:
+    user_data = context.application.user_data
+    sizes = user_data_report(user_data)
+    top = ", ".join(
+        f"{key}={size / 1024:.0f}KiB"
+        for key, size in list(sizes.items())[:MEMORY_REPORT_TOP_KEYS]
+    )
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    logging.info(
+        f"[MEMORY] user_data: {len(user_data)} users, "
+        f"{sum(sizes.values()) / 1024:.0f}KiB ({top or 'empty'}); heavy cache: "
+        f"{len(HEAVY_VALUES)} values, {HEAVY_VALUES.currsize / 1024:.0f}KiB; "
+        f"peak RSS {peak_rss:.0f}MiB"
+    )
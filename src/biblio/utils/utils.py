@@ -1,15 +1,15 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from io import BytesIO
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
-import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
-import pandas as pd
 from dateutil.parser import parse
-from pandas import DataFrame
 
 from src.biblio.config.config import Schedule
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 LIB_SCHEDULE = Schedule.weekly()
 
 
@@ -38,15 +38,30 @@ def generate_days(past: int = 0, future: int = 5) -> list:
     return days
 
 
+def select_slot_window(history: 'DataFrame', slot: str, start: time, end: time) -> 'DataFrame':
+    """Rows of `slot` with a Rome wall-clock time in [start, end), as naive local times."""
+    import pandas as pd
+
+    rows = history[history['slot'] == slot]
+    local = pd.to_datetime(rows['job_timestamp'], utc=True).dt.tz_convert('Europe/Rome')
+    minutes = local.dt.hour * 60 + local.dt.minute
+    in_window = (minutes >= start.hour * 60 + start.minute) & (minutes < end.hour * 60 + end.minute)
+    return pd.DataFrame(
+        {'time': local[in_window].dt.tz_localize(None), 'available': rows['available'][in_window]}
+    )
+
+
 # !TODO: fix for edge case: only one point!
-def plot_slot_history(df: DataFrame, date: str, slot: str, start: str = None, end: str = None) -> BytesIO:
+def plot_slot_history(df: 'DataFrame', date: str, slot: str, start: str = None, end: str = None) -> BytesIO:
+    import matplotlib.dates as mdates  # loaded by the chart workers only
+    import matplotlib.pyplot as plt
+
     parsed_date = parse(date)
     day_label = parsed_date.strftime('%A, %Y-%m-%d')
     title = f'{day_label} for Slot {slot}'
     if start and end:
         title += f' (Range: {start}–{end})'
 
-    df['time'] = pd.to_datetime(df['time'])
     y_min = df['available'].min()
     y_max = df['available'].max()
 
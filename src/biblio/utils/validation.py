@@ -3,7 +3,6 @@ import re
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from pandas import DataFrame
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -70,7 +69,7 @@ async def duration_overlap(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     codice = context.user_data[UserDataKey.CODICE_FISCALE]
     email = context.user_data[UserDataKey.EMAIL]
     selected_date = context.user_data[UserDataKey.SELECTED_DATE]
-    history: DataFrame = await fetch_user_reservations(
+    history = await fetch_user_reservations(
         codice, email, selected_date, include_date=True
     )
     if len(history) == 0:
@@ -80,10 +79,10 @@ async def duration_overlap(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         context.user_data[UserDataKey.SELECTED_TIME], "%H:%M"
     )
     reserving_end = reserving_start + timedelta(hours=int(update.message.text.strip()))
-    for _, row in history.iterrows():
-        existing_start = datetime.strptime(row["start_time"].strftime("%H:%M"), "%H:%M")
-        existing_end = datetime.strptime(row["end_time"].strftime("%H:%M"), "%H:%M")
-        if row["status"] in (Status.TERMINATED, Status.CANCELED):
+    for row in history:
+        existing_start = datetime.strptime(row.start_time.strftime("%H:%M"), "%H:%M")
+        existing_end = datetime.strptime(row.end_time.strftime("%H:%M"), "%H:%M")
+        if row.status in (Status.TERMINATED, Status.CANCELED):
             continue
         if reserving_start < existing_end and reserving_end > existing_start:
             return True
@@ -94,21 +93,21 @@ async def time_not_overlap(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     codice = context.user_data[UserDataKey.CODICE_FISCALE]
     email = context.user_data[UserDataKey.EMAIL]
     selected_date = context.user_data[UserDataKey.SELECTED_DATE]
-    history: DataFrame = await fetch_user_reservations(
+    history = await fetch_user_reservations(
         codice, email, selected_date, include_date=True
     )
     input = update.message.text.strip()
     reserving_start = datetime.strptime(input, "%H:%M").replace(
         tzinfo=ZoneInfo("Europe/Rome")
     )
-    for _, row in history.iterrows():
+    for row in history:
         existing_start = datetime.strptime(
-            row["start_time"].strftime("%H:%M"), "%H:%M"
+            row.start_time.strftime("%H:%M"), "%H:%M"
         ).replace(tzinfo=ZoneInfo("Europe/Rome"))
         existing_end = datetime.strptime(
-            row["end_time"].strftime("%H:%M"), "%H:%M"
+            row.end_time.strftime("%H:%M"), "%H:%M"
         ).replace(tzinfo=ZoneInfo("Europe/Rome"))
-        if row["status"] in (Status.TERMINATED, Status.CANCELED):
+        if row.status in (Status.TERMINATED, Status.CANCELED):
             continue
         if (
             reserving_start >= existing_start - timedelta(minutes=30)